@@ -0,0 +1,171 @@
+"""How API responses go over the wire: encoding, compression, validators and compact shapes.
+
+- `FastJSONResponse` serializes with orjson when it is installed (plain json otherwise).
+- `CompressionMiddleware` gzip- or brotli-encodes buffered responses above a size threshold.
+- `conditional_response` adds an ETag and answers a matching If-None-Match with 304.
+- `compact_restaurants` is the smaller, columnar form of a restaurant list.
+"""
+import gzip
+import hashlib
+import json
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse, Response
+
+try:
+    import orjson
+except ImportError:  # Optional; the standard library encoder is just slower
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # Optional; clients are then offered gzip only
+    brotli = None
+
+MIN_COMPRESS_BYTES = 1024  # Smaller bodies are not worth the CPU or the extra headers
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4  # Close to gzip -6 in speed, noticeably smaller on JSON
+
+COMPACT_RESTAURANT_FIELDS = ("place_id", "name", "address", "rating", "latitude", "longitude", "yelp", "distance_m")
+YELP_BIZ_PREFIX = "https://www.yelp.com/biz/"
+
+
+def dumps(content):
+    """Encode `content` as compact UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with `dumps`."""
+
+    def render(self, content):
+        return dumps(content)
+
+
+def choose_encoding(accept_encoding):
+    """Best supported content coding the client accepts: "br", "gzip" or None."""
+    accepted = set()
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0"):
+            continue
+        accepted.add(coding.strip().lower())
+    if brotli is not None and ("br" in accepted or "*" in accepted):
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+class CompressionMiddleware:
+    """Compress single-message responses of at least `minimum_size` bytes.
+
+    Streaming responses (the NDJSON event streams) pass through untouched, so
+    each event still reaches the client as soon as it is sent.
+    """
+
+    def __init__(self, app, minimum_size=MIN_COMPRESS_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start = message  # Held until we know whether the body gets compressed
+                return
+
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=start["headers"])
+            if message.get("more_body", False) or len(body) < self.minimum_size or "content-encoding" in headers:
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            body = compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
+
+
+def etag(*parts):
+    """Weak validator over `parts` (str or bytes); weak because the body may be re-encoded in transit."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else part.encode("utf-8"))
+        digest.update(b"\0")
+    return f'W/"{digest.hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match, tag):
+    """Weak comparison of an If-None-Match header against `tag`."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = tag[2:] if tag.startswith("W/") else tag
+    return any(
+        (candidate[2:] if candidate.startswith("W/") else candidate) == opaque
+        for candidate in (c.strip() for c in if_none_match.split(","))
+    )
+
+
+def conditional_response(request, key, content):
+    """JSON response tagged with an ETag of the canonical request `key` and the body.
+
+    If the client already holds that exact result (If-None-Match), a bodiless 304
+    is returned instead. Clients must revalidate every time (no-cache), since a
+    fresh generation can change the result for the same request.
+    """
+    body = dumps(content)
+    headers = {"ETag": etag(key, body), "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+def short_yelp_url(url):
+    """Yelp business links become their slug without tracking parameters; search links stay as they are."""
+    if url and url.startswith(YELP_BIZ_PREFIX):
+        return url[len(YELP_BIZ_PREFIX):].split("?", 1)[0]
+    return url
+
+
+def compact_restaurants(restaurants):
+    """Columnar restaurant list: field names once, then one row per restaurant.
+
+    Google Maps links are dropped (clients rebuild them from `place_id`) and Yelp
+    business links are shortened to their slug, see `short_yelp_url`.
+    """
+    rows = []
+    for r in restaurants:
+        row = dict(r, yelp=short_yelp_url(r.get("yelp_url")))
+        rows.append([row.get(field) for field in COMPACT_RESTAURANT_FIELDS])
+    return {"fields": list(COMPACT_RESTAURANT_FIELDS), "rows": rows}
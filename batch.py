@@ -0,0 +1,131 @@
+"""Batch processing of DietRequest records stored as JSON Lines.
+
+Used by the /recommend/batch endpoint and runnable as an offline job:
+
+    python batch.py requests.jsonl results.jsonl --concurrency 8
+
+Each input line is one DietRequest, optionally with an "id" (the line number is
+used otherwise). Results are appended to the output file as they finish, and
+the ids of successful records (complete meal plans, non-empty restaurant lists)
+go to a checkpoint file, so re-running the same command after an interruption
+or a provider outage skips work that is already done. A record that was
+written but not yet checkpointed when the job died is processed again, so the
+output may then hold two lines for it; the later one wins.
+"""
+import argparse
+import asyncio
+import json
+import os
+
+MAX_BATCH_CONCURRENCY = 8  # Records processed at the same time
+
+_DONE = object()
+
+
+def read_records(lines):
+    """Yield `(record_id, record)` for every non-blank line; record is None if it is not valid JSON."""
+    for line_number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            yield str(line_number), None
+            continue
+        record_id = record.get("id", line_number) if isinstance(record, dict) else line_number
+        yield str(record_id), record
+
+
+async def process_record(process, record_id, record, is_complete=None):
+    if not isinstance(record, dict):
+        return {"id": record_id, "error": "Record is not a valid JSON object."}
+    try:
+        response = await process(record)
+    except Exception as e:
+        print(f"⚠️ Batch record {record_id} failed: {e}")
+        return {"id": record_id, "error": str(e)}
+    if is_complete is not None and not is_complete(response):
+        # e.g. an LLM outage leaves an empty plan; report it so a resumed run retries the record
+        return {"id": record_id, "error": response.get("error", "Incomplete recommendation."), "response": response}
+    return {"id": record_id, "response": response}
+
+
+async def run_batch(records, process, max_concurrency=MAX_BATCH_CONCURRENCY, is_complete=None):
+    """Run `process(record)` over `(record_id, record)` pairs, yielding results as they finish.
+
+    At most `max_concurrency` records are in flight, and `records` is consumed
+    lazily, so arbitrarily large inputs are fine. Responses `is_complete`
+    rejects are reported as errors.
+    """
+    pending = iter(records)
+    results = asyncio.Queue()
+
+    async def worker():
+        try:
+            for record_id, record in pending:
+                await results.put(await process_record(process, record_id, record, is_complete))
+        finally:
+            await results.put(_DONE)
+
+    workers = [asyncio.ensure_future(worker()) for _ in range(max(1, max_concurrency))]
+    finished = 0
+    try:
+        while finished < len(workers):
+            result = await results.get()
+            if result is _DONE:
+                finished += 1
+            else:
+                yield result
+    finally:
+        for task in workers:
+            task.cancel()
+
+
+def load_checkpoint(path):
+    """Ids of records that completed in a previous run."""
+    if not os.path.exists(path):
+        return set()
+    with open(path, "r") as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+async def run_file(input_path, output_path, checkpoint_path, max_concurrency=MAX_BATCH_CONCURRENCY):
+    from demo import DietRequest, is_complete_response, recommend
+
+    async def process(record):
+        return await recommend(DietRequest(**record))
+
+    completed = load_checkpoint(checkpoint_path)
+    succeeded = failed = 0
+
+    with open(input_path, "r") as src, open(output_path, "a") as out, open(checkpoint_path, "a") as checkpoint:
+        records = ((record_id, record) for record_id, record in read_records(src) if record_id not in completed)
+        async for result in run_batch(records, process, max_concurrency, is_complete_response):
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+            if "error" in result:
+                failed += 1
+                continue
+            checkpoint.write(result["id"] + "\n")
+            checkpoint.flush()
+            succeeded += 1
+
+    print(f"✅ {succeeded} succeeded, ❌ {failed} failed, ⏭ {len(completed)} skipped from checkpoint")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate recommendations for a JSONL file of DietRequest records.")
+    parser.add_argument("input", help="JSONL file with one DietRequest per line")
+    parser.add_argument("output", help="JSONL file results are appended to")
+    parser.add_argument("--checkpoint", help="File of completed record ids (default: OUTPUT.checkpoint)")
+    parser.add_argument("--concurrency", type=int, default=MAX_BATCH_CONCURRENCY,
+                        help="Records processed at the same time")
+    args = parser.parse_args()
+
+    checkpoint_path = args.checkpoint or f"{args.output}.checkpoint"
+    asyncio.run(run_file(args.input, args.output, checkpoint_path, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
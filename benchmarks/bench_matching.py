@@ -0,0 +1,80 @@
+"""Micro-benchmark: legacy nested-loop Yelp matching vs. the batch matcher.
+
+Run from the repository root:
+
+    python benchmarks/bench_matching.py
+"""
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from thefuzz import fuzz  # noqa: E402
+
+from matching import match_yelp  # noqa: E402
+
+SIZES = [(5, 10), (20, 40), (60, 120), (200, 400)]  # (Google places, Yelp businesses)
+REPEATS = 5
+
+WORDS = ["golden", "dragon", "thai", "basil", "green", "leaf", "blue", "ocean", "sushi", "taco",
+         "burger", "joint", "pho", "house", "garden", "noodle", "bistro", "corner", "spice", "olive"]
+STREETS = ["Main St", "Broadway", "Market St", "Elm Ave", "Oak Rd", "5th Ave", "Park Pl"]
+
+
+def random_business(rng):
+    name = " ".join(rng.sample(WORDS, 2)).title() + " " + rng.choice(string.ascii_uppercase)
+    address = f"{rng.randint(1, 999)} {rng.choice(STREETS)}"
+    return name, address
+
+
+def make_dataset(n_places, n_yelp, rng):
+    businesses = [random_business(rng) for _ in range(max(n_places, n_yelp))]
+    places = [{"name": name, "vicinity": address} for name, address in businesses[:n_places]]
+    yelp_data = {
+        name.lower(): {"url": f"https://www.yelp.com/biz/{i}", "address": address + ", New York, NY"}
+        for i, (name, address) in enumerate(rng.sample(businesses, n_yelp))
+    }
+    return places, yelp_data
+
+
+def match_yelp_loop(places, yelp_data):
+    """The original per-place greedy loop from search_restaurants."""
+    matches = []
+    for r in places:
+        best_match, best_score = None, 0
+        for yelp_name, yelp_info in yelp_data.items():
+            name_score = fuzz.ratio(r["name"].lower(), yelp_name.lower())
+            address_score = fuzz.partial_ratio(r.get("vicinity", "").lower(), yelp_info["address"].lower())
+            total_score = (name_score * 0.7) + (address_score * 0.3)
+            if total_score > best_score and total_score > 75:
+                best_score, best_match = total_score, yelp_name
+        matches.append(best_match)
+    return matches
+
+
+def best_time(fn, *args):
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = fn(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    rng = random.Random(42)
+    print(f"{'places x yelp':>14} {'loop (ms)':>10} {'batch (ms)':>11} {'speedup':>8} {'loop dup claims':>16}")
+    for n_places, n_yelp in SIZES:
+        places, yelp_data = make_dataset(n_places, n_yelp, rng)
+        loop_time, loop_matches = best_time(match_yelp_loop, places, yelp_data)
+        batch_time, _ = best_time(match_yelp, places, yelp_data)
+        claimed = [m for m in loop_matches if m]
+        print(f"{n_places:>6} x {n_yelp:<5} {loop_time * 1000:>10.2f} {batch_time * 1000:>11.2f} "
+              f"{loop_time / batch_time:>7.1f}x {len(claimed) - len(set(claimed)):>16}")
+
+
+if __name__ == "__main__":
+    main()
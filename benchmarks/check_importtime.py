@@ -0,0 +1,119 @@
+"""Import-time regression check for the backend.
+
+Imports demo.py in a fresh interpreter under `python -X importtime` a few
+times, takes the fastest run and compares it with the budget recorded in
+benchmarks/importtime_budget.json. The budget is relative: demo's import time
+divided by that of fastapi (demo's first import) in the same run, so a slower
+machine moves both and only a slowdown in our own imports fails the check.
+The tolerance can be set per environment with IMPORTTIME_TOLERANCE. Also fails if importing demo pulls in a
+dependency that should only load on the code path that needs it, or if
+frontend.py imports one of its heavy libraries at module level.
+
+    python benchmarks/check_importtime.py            # exit 1 on a regression (for CI)
+    python benchmarks/check_importtime.py --update   # record the current time as the new budget
+"""
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET_FILE = os.path.join(ROOT, "benchmarks", "importtime_budget.json")
+
+# Only imported on the request path that needs them
+LAZY_BACKEND_MODULES = ["openai", "numpy", "scipy", "rapidfuzz", "thefuzz"]
+LAZY_FRONTEND_MODULES = ["matplotlib", "folium", "streamlit_folium", "geocoder"]
+
+BASELINE_MODULE = "fastapi"  # Imported first by demo; its cost tracks the machine, not our code
+DEFAULT_TOLERANCE = float(os.environ.get("IMPORTTIME_TOLERANCE", 0.25))
+
+PROBE = (
+    "import json, sys; import demo; "
+    "print(json.dumps(sorted(m for m in {lazy!r} if m in sys.modules)))"
+)
+
+
+def measure(runs):
+    """Return (demo ms, baseline ms) of the run where demo imported fastest, and the eagerly loaded lazy modules."""
+    env = dict(os.environ, NUTRITION_DB=":memory:", FRIDGE_DB=":memory:", RESTAURANT_INDEX_DB=":memory:")
+    env.pop("PROVIDER_CACHE_DB", None)
+    timings = []
+    loaded = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", PROBE.format(lazy=LAZY_BACKEND_MODULES)],
+            cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+        )
+        # Lines look like "import time:   self [us] | cumulative | imported package"
+        cumulative = {}
+        for line in result.stderr.splitlines():
+            parts = [part.strip() for part in line.split("|")]
+            if len(parts) == 3 and parts[2] in ("demo", BASELINE_MODULE):
+                cumulative[parts[2]] = int(parts[1]) / 1000
+        timings.append((cumulative["demo"], cumulative[BASELINE_MODULE]))
+        loaded = json.loads(result.stdout.strip().splitlines()[-1])
+    return min(timings), loaded
+
+
+def eager_frontend_imports(path=os.path.join(ROOT, "frontend.py")):
+    """Heavy frontend libraries imported at module level rather than where they are used."""
+    with open(path, "r") as f:
+        tree = ast.parse(f.read())
+    found = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            names = [node.module or ""]
+        else:
+            continue
+        found.extend(name for name in names if name.split(".")[0] in LAZY_FRONTEND_MODULES)
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if importing the backend got slower.")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to time; the fastest counts")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed slowdown over the budget as a fraction (machines are noisy); "
+                             "defaults to IMPORTTIME_TOLERANCE or 0.25")
+    parser.add_argument("--update", action="store_true", help="Write the measured time as the new budget")
+    args = parser.parse_args()
+
+    (import_ms, baseline_ms), loaded = measure(args.runs)
+    ratio = import_ms / baseline_ms
+    print(f"import demo: {import_ms:.0f} ms, {ratio:.2f}x import {BASELINE_MODULE} ({baseline_ms:.0f} ms), "
+          f"fastest of {args.runs}")
+
+    if args.update:
+        with open(BUDGET_FILE, "w") as f:
+            json.dump({"baseline_module": BASELINE_MODULE, "demo_import_ratio": round(ratio, 2),
+                       "demo_import_ms": round(import_ms)}, f, indent=2)
+            f.write("\n")
+        print(f"✅ Budget updated in {os.path.relpath(BUDGET_FILE, ROOT)}")
+        return
+
+    failures = []
+    with open(BUDGET_FILE, "r") as f:
+        budget = json.load(f)
+    budget_ratio = budget["demo_import_ratio"]
+    if ratio > budget_ratio * (1 + args.tolerance):
+        failures.append(f"import demo took {ratio:.2f}x import {BASELINE_MODULE}, budget is {budget_ratio}x "
+                        f"(+{args.tolerance:.0%}); {import_ms:.0f} ms here, {budget['demo_import_ms']} ms when recorded")
+    if loaded:
+        failures.append(f"import demo eagerly loads {', '.join(loaded)}")
+    eager = eager_frontend_imports()
+    if eager:
+        failures.append(f"frontend.py imports {', '.join(eager)} at module level")
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    if failures:
+        sys.exit(1)
+    print(f"✅ Within budget ({budget_ratio}x +{args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""Local stand-ins for the OpenAI, Google Places/Geocoding, Yelp and YouTube APIs.
+
+Serves just enough of each API for demo.py to run end to end without network
+access. Every provider answers after a random delay drawn from a log-normal
+distribution and fails with HTTP 503 at a configurable rate. Streamed chat
+completions send the first line after `first_line_share` of that delay and the
+remaining lines spread over the rest:
+
+    FAKE_PROVIDER_CONFIG='{"openai": {"median_ms": 800, "sigma": 0.4, "error_rate": 0.01}}' \\
+        uvicorn --app-dir benchmarks fake_providers:app --port 9100
+
+then start the backend with OPENAI_BASE_URL=http://127.0.0.1:9100/v1 and
+GOOGLE_API_BASE_URL / YELP_API_BASE_URL / YOUTUBE_API_BASE_URL set to
+http://127.0.0.1:9100. `loadtest.py` does all of this for you.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# Default latency (median ms, log-normal sigma) and error rate per provider
+DEFAULT_PROFILES = {
+    "openai": {"median_ms": 900, "sigma": 0.35, "error_rate": 0.0, "first_line_share": 0.3},
+    "google": {"median_ms": 120, "sigma": 0.3, "error_rate": 0.0},
+    "yelp": {"median_ms": 180, "sigma": 0.3, "error_rate": 0.0},
+    "youtube": {"median_ms": 150, "sigma": 0.3, "error_rate": 0.0},
+}
+
+DISHES = ["Grilled Chicken Salad", "Avocado Toast", "Lentil Soup", "Salmon Poke Bowl", "Veggie Omelette",
+          "Quinoa Buddha Bowl", "Turkey Chili", "Greek Yogurt Parfait", "Shrimp Stir Fry", "Tofu Curry"]
+NAME_WORDS = ["Golden", "Green", "Olive", "Harbor", "Spice", "Corner", "Garden", "Urban", "Lotus", "Maple"]
+NAME_KINDS = ["Kitchen", "Bistro", "Grill", "Cafe", "House", "Eatery", "Table", "Bowl"]
+
+
+def load_profiles():
+    profiles = {name: dict(profile) for name, profile in DEFAULT_PROFILES.items()}
+    for name, overrides in json.loads(os.environ.get("FAKE_PROVIDER_CONFIG", "{}")).items():
+        profiles.setdefault(name, {}).update(overrides)
+    return profiles
+
+
+PROFILES = load_profiles()
+app = FastAPI()
+
+
+def sample_delay(provider):
+    profile = PROFILES[provider]
+    return profile["median_ms"] / 1000 * random.lognormvariate(0, profile["sigma"])
+
+
+def fail(provider):
+    """An error response if this call should fail, else None."""
+    if random.random() < PROFILES[provider]["error_rate"]:
+        return JSONResponse({"error": {"message": f"fake {provider} outage"}}, status_code=503)
+    return None
+
+
+async def simulate(provider):
+    """Sleep for a sampled latency; return an error response if this call should fail."""
+    await asyncio.sleep(sample_delay(provider))
+    return fail(provider)
+
+
+def seeded(*parts):
+    """Deterministic RNG so the same query always gets the same fake answer."""
+    return random.Random(hashlib.sha256("|".join(map(str, parts)).encode()).hexdigest())
+
+
+def fake_businesses(keyword, latitude, longitude, count):
+    rng = seeded(keyword, round(latitude, 3), round(longitude, 3))
+    businesses = []
+    for i in range(count):
+        name = f"{rng.choice(NAME_WORDS)} {keyword.title()} {rng.choice(NAME_KINDS)}"
+        businesses.append({
+            "id": hashlib.md5(f"{name}{i}".encode()).hexdigest()[:16],
+            "name": name,
+            "address": f"{rng.randint(1, 999)} {rng.choice(['Main St', 'Broadway', 'Market St'])}",
+            "lat": latitude + rng.uniform(-0.02, 0.02),
+            "lng": longitude + rng.uniform(-0.02, 0.02),
+            "rating": round(rng.uniform(3, 5), 1),
+        })
+    return businesses
+
+
+def chat_completion(content):
+    return {
+        "id": f"chatcmpl-{int(time.time() * 1000)}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": "gpt-4",
+        "choices": [{"index": 0, "finish_reason": "stop",
+                     "message": {"role": "assistant", "content": content}}],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
+
+
+def answer_prompt(prompt):
+    rng = seeded(prompt)
+    if "nutritional breakdown" in prompt:
+        dishes = re.findall(r"^\s*- (.+)$", prompt, flags=re.MULTILINE)
+        dishes = [d for d in dishes if not d.startswith(("Calories", "Protein", "Carbohydrates", "Fat"))]
+        return json.dumps([
+            {"dish": dish, "calories": rng.randint(300, 900), "protein": rng.randint(10, 60),
+             "carbohydrates": rng.randint(10, 90), "fat": rng.randint(5, 45)}
+            for dish in dishes or ["dish"]
+        ])
+    dishes = rng.sample(DISHES, 3)
+    if "dish types" in prompt:
+        return "\n".join(dishes)
+    return "\n".join(dishes + ["", "Advice: Balanced protein and fiber across the day; add leafy greens at dinner."])
+
+
+def completion_chunk(delta, finish_reason=None):
+    chunk = {
+        "id": "chatcmpl-stream",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": "gpt-4",
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+    return f"data: {json.dumps(chunk)}\n\n"
+
+
+async def stream_chat_completion(content, delay):
+    """Server-sent events in the OpenAI streaming format, one chunk per line of `content`."""
+    lines = content.split("\n")
+    first_line_delay = delay * PROFILES["openai"]["first_line_share"]
+    await asyncio.sleep(first_line_delay)
+    yield completion_chunk({"role": "assistant", "content": ""})
+    for i, line in enumerate(lines):
+        if i:
+            await asyncio.sleep((delay - first_line_delay) / max(len(lines) - 1, 1))
+        yield completion_chunk({"content": line + ("\n" if i < len(lines) - 1 else "")})
+    yield completion_chunk({}, finish_reason="stop")
+    yield "data: [DONE]\n\n"
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    content = answer_prompt(body["messages"][-1]["content"])
+    if body.get("stream"):
+        error = fail("openai")
+        if error:
+            return error
+        return StreamingResponse(stream_chat_completion(content, sample_delay("openai")),
+                                 media_type="text/event-stream")
+
+    error = await simulate("openai")
+    if error:
+        return error
+    return chat_completion(content)
+
+
+@app.get("/maps/api/place/nearbysearch/json")
+async def nearby_search(location: str, keyword: str = "", radius: int = 5000):
+    error = await simulate("google")
+    if error:
+        return error
+    latitude, longitude = map(float, location.split(","))
+    return {
+        "status": "OK",
+        "results": [
+            {"name": b["name"], "vicinity": b["address"], "rating": b["rating"], "place_id": f"fake-{b['id']}",
+             "geometry": {"location": {"lat": b["lat"], "lng": b["lng"]}}}
+            for b in fake_businesses(keyword, latitude, longitude, 20)
+        ],
+    }
+
+
+@app.get("/maps/api/geocode/json")
+async def geocode(latlng: str):
+    error = await simulate("google")
+    if error:
+        return error
+    return {"status": "OK", "results": [{"address_components": [
+        {"long_name": "Faketown", "types": ["locality", "political"]}
+    ]}]}
+
+
+@app.get("/v3/businesses/search")
+async def yelp_search(term: str, latitude: float, longitude: float, limit: int = 10):
+    error = await simulate("yelp")
+    if error:
+        return error
+    return {"businesses": [
+        {"name": b["name"], "url": f"https://www.yelp.com/biz/{b['id']}",
+         "location": {"display_address": [b["address"], "Faketown"]}}
+        for b in fake_businesses(term, latitude, longitude, limit)
+    ]}
+
+
+@app.get("/youtube/v3/search")
+async def youtube_search(q: str):
+    error = await simulate("youtube")
+    if error:
+        return error
+    return {"items": [{"id": {"videoId": hashlib.md5(q.encode()).hexdigest()[:11]}}]}
@@ -0,0 +1,197 @@
+"""Offline load test for /recommend against local fake providers.
+
+Starts benchmarks/fake_providers.py and the FastAPI backend (demo:app) as
+subprocesses, points the backend at the fakes, then drives /recommend in Home
+and Outside mode at increasing concurrency and reports throughput and
+p50/p95/p99 latency. No network access or API keys are needed.
+
+    python benchmarks/loadtest.py --concurrency 1 4 16 --requests 50
+    python benchmarks/loadtest.py --max-p95-ms 3000   # exit 1 if any level is slower (for CI)
+
+Provider latency and error rates are set with FAKE_PROVIDER_CONFIG, see
+fake_providers.py.
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+GOALS = ["Muscle Gain", "Weight Loss", "Maintain Health"]
+PREFERENCES = ["high protein", "low carb", "vegetarian", "low fat", "high fiber", "mediterranean"]
+ALLERGIES = ["nuts", "gluten", "dairy", "shellfish", "soy"]
+INGREDIENTS = ["chicken", "egg", "fish", "spinach", "rice", "tomato", "avocado", "beans", "tofu", "oats"]
+CITY_CENTER = (40.730610, -73.935242)
+MEALS = ("breakfast", "lunch", "dinner")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(app, port, env, app_dir=ROOT):
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "--app-dir", app_dir, app,
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env,
+    )
+
+
+def wait_until_up(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+def random_payload(mode, rng, fresh):
+    payload = {
+        "preferences": rng.sample(PREFERENCES, rng.randint(0, 2)),
+        "goal": rng.choice(GOALS),
+        "allergies": rng.sample(ALLERGIES, rng.randint(0, 1)),
+        "eat_location": mode,
+        "fresh": fresh,
+    }
+    if mode == "Home":
+        payload["available_ingredients"] = rng.sample(INGREDIENTS, rng.randint(2, 6))
+    else:
+        payload["latitude"] = CITY_CENTER[0] + rng.uniform(-0.05, 0.05)
+        payload["longitude"] = CITY_CENTER[1] + rng.uniform(-0.05, 0.05)
+    return payload
+
+
+def is_usable(body):
+    """True for a full meal plan or a non-empty restaurant list; anything else counts as an error."""
+    if "error" in body:
+        return False
+    if "recommendations" in body:
+        plan = body["recommendations"]
+        return all(plan.get(meal, {}).get("dish") and plan[meal].get("nutrients") for meal in MEALS)
+    return bool(body.get("restaurants"))
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return float("nan")
+    index = min(len(sorted_values) - 1, max(0, round(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def run_level(client, mode, concurrency, total, rng, fresh):
+    """Send `total` requests with `concurrency` in flight; return (latencies, errors, elapsed)."""
+    latencies = []
+    errors = 0
+    remaining = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            start = time.perf_counter()
+            try:
+                response = await client.post("/recommend", json=random_payload(mode, rng, fresh))
+                response.raise_for_status()
+                if not is_usable(response.json()):
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return sorted(latencies), errors, time.perf_counter() - start
+
+
+async def drive(base_url, modes, levels, total, seed, fresh):
+    rng = random.Random(seed)
+    results = []
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        for mode in modes:
+            for concurrency in levels:
+                latencies, errors, elapsed = await run_level(client, mode, concurrency, total, rng, fresh)
+                results.append({
+                    "mode": mode,
+                    "concurrency": concurrency,
+                    "requests": len(latencies),
+                    "errors": errors,
+                    "throughput": len(latencies) / elapsed,
+                    "p50_ms": percentile(latencies, 50) * 1000,
+                    "p95_ms": percentile(latencies, 95) * 1000,
+                    "p99_ms": percentile(latencies, 99) * 1000,
+                })
+    return results
+
+
+def print_report(results):
+    print(f"{'mode':<8} {'conc':>5} {'reqs':>5} {'errs':>5} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for r in results:
+        print(f"{r['mode']:<8} {r['concurrency']:>5} {r['requests']:>5} {r['errors']:>5} {r['throughput']:>8.1f} "
+              f"{r['p50_ms']:>9.0f} {r['p95_ms']:>9.0f} {r['p99_ms']:>9.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test /recommend against local fake providers.")
+    parser.add_argument("--modes", nargs="+", default=["Home", "Outside"], choices=["Home", "Outside"])
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4, 16, 32])
+    parser.add_argument("--requests", type=int, default=40, help="Requests per mode and concurrency level")
+    parser.add_argument("--fresh", action="store_true", help="Bypass the response caches on every request")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--max-p95-ms", type=float, help="Exit with status 1 if any level's p95 exceeds this")
+    parser.add_argument("--max-error-rate", type=float, default=0.0,
+                        help="Exit with status 1 if any level's error share exceeds this")
+    args = parser.parse_args()
+
+    fake_port, app_port = free_port(), free_port()
+    fake_url = f"http://127.0.0.1:{fake_port}"
+    env = dict(
+        os.environ,
+        OPENAI_BASE_URL=f"{fake_url}/v1",
+        GOOGLE_API_BASE_URL=fake_url,
+        YELP_API_BASE_URL=fake_url,
+        YOUTUBE_API_BASE_URL=fake_url,
+        NUTRITION_DB=":memory:",
+        FRIDGE_DB=":memory:",
+        RESTAURANT_INDEX_DB=":memory:",
+    )
+    env.pop("PROVIDER_CACHE_DB", None)
+
+    servers = [
+        start_server("fake_providers:app", fake_port, env, app_dir=os.path.join(ROOT, "benchmarks")),
+        start_server("demo:app", app_port, env),
+    ]
+    try:
+        wait_until_up(fake_port)
+        wait_until_up(app_port)
+        results = asyncio.run(drive(f"http://127.0.0.1:{app_port}", args.modes, args.concurrency,
+                                    args.requests, args.seed, args.fresh))
+    finally:
+        for server in servers:
+            server.terminate()
+        for server in servers:
+            server.wait()
+
+    print_report(results)
+
+    failed = [r for r in results
+              if (args.max_p95_ms is not None and r["p95_ms"] > args.max_p95_ms)
+              or r["errors"] / max(r["requests"], 1) > args.max_error_rate]
+    if failed:
+        print(f"❌ {len(failed)} level(s) exceeded the latency or error budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+"""Caches for external provider responses (Google Places, Yelp, Geocoding) and LLM answers.
+
+Lookups are keyed on a geohash cell instead of the raw coordinates, so users
+standing a few blocks apart share the same entry. Each provider gets its own
+TTL and memory budget; entries can optionally be mirrored to SQLite so the
+cache survives restarts.
+
+LLM answers are keyed on a canonical form of the request (lowercased, sorted,
+de-duplicated lists), since goals, preferences and allergies repeat a lot.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from cachetools import TLRUCache
+
+GEOHASH_PRECISION = 6  # ~1.2km x 0.6km cells, used for Places / Yelp searches
+CITY_GEOHASH_PRECISION = 5  # ~4.9km x 4.9km cells, plenty for a city name
+
+# Seconds each provider's answers stay fresh
+PROVIDER_TTLS = {
+    "places": 6 * 60 * 60,
+    "yelp": 6 * 60 * 60,
+    "geocode": 7 * 24 * 60 * 60,
+}
+MAX_CACHE_BYTES = 16 * 1024 * 1024  # Approximate in-memory budget per provider
+
+# Seconds a generated meal plan / dish-type list is served before asking the LLM again
+RESPONSE_TTLS = {
+    "recommendations": 12 * 60 * 60,
+    "dishes": 12 * 60 * 60,
+}
+MAX_RESPONSE_CACHE_BYTES = 8 * 1024 * 1024
+
+# Set PROVIDER_CACHE_DB to a file path to keep cached responses across restarts
+CACHE_DB_PATH = os.environ.get("PROVIDER_CACHE_DB")
+PURGE_INTERVAL = 60 * 60  # Seconds between sweeps of expired rows out of the SQLite file
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_MISSING = object()
+
+
+def geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    """Encode a coordinate as a geohash string of `precision` characters."""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    use_lng = True
+
+    while len(chars) < precision:
+        value, bounds = (longitude, lng_range) if use_lng else (latitude, lat_range)
+        mid = (bounds[0] + bounds[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            bounds[0] = mid
+        else:
+            bits <<= 1
+            bounds[1] = mid
+
+        use_lng = not use_lng
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return "".join(chars)
+
+
+def normalize_keyword(keyword):
+    """Lowercase and collapse whitespace so equivalent search terms share a key."""
+    return " ".join(str(keyword).lower().split())
+
+
+def canonical_list(values):
+    """Lowercase, strip, de-duplicate and sort free-text list entries."""
+    return sorted({normalize_keyword(v) for v in values} - {""})
+
+
+def canonical_request(request):
+    """Canonical form of a DietRequest: equivalent requests produce equal dicts."""
+    return {
+        "preferences": canonical_list(request.preferences),
+        "goal": normalize_keyword(request.goal),
+        "allergies": canonical_list(request.allergies),
+        "available_ingredients": canonical_list(request.available_ingredients),
+        "latitude": request.latitude,
+        "longitude": request.longitude,
+        "eat_location": request.eat_location,
+    }
+
+
+def request_key(**fields):
+    """Stable hash of keyword fields, for keying responses on canonical inputs."""
+    payload = json.dumps(fields, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _sizeof(entry):
+    return len(entry[0])
+
+
+def _expires_at(_key, entry, _now):
+    return entry[1]
+
+
+class SQLiteBackend:
+    """On-disk store shared by every provider cache, one row per (namespace, key)."""
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " namespace TEXT NOT NULL,"
+                " key TEXT NOT NULL,"
+                " value TEXT NOT NULL,"
+                " expires_at REAL NOT NULL,"
+                " PRIMARY KEY (namespace, key))"
+            )
+        self.purge_expired()
+
+    def get(self, namespace, key):
+        """Return `(value, expires_at)` for a live entry, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ?",
+                (namespace, key)
+            ).fetchone()
+        if row is None or row[1] <= time.time():
+            return None
+        return row
+
+    def set(self, namespace, key, value, expires_at):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (namespace, key, value, expires_at)
+            )
+        if time.time() >= self._next_purge:
+            self.purge_expired()
+
+    def purge_expired(self):
+        """Delete expired rows; runs on open and then at most every PURGE_INTERVAL, from `set`."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._next_purge = now + PURGE_INTERVAL
+            self._conn.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class ProviderCache:
+    """TTL cache with LRU eviction under a memory budget, optionally backed by SQLite.
+
+    Values must be JSON-serializable; they are stored encoded, which also gives
+    a cheap size estimate for the memory bound. Each entry keeps its own expiry
+    time, so a value read back from SQLite expires when the stored row does
+    rather than getting a fresh TTL.
+    """
+
+    def __init__(self, name, ttl, max_bytes=MAX_CACHE_BYTES, backend=None):
+        self.name = name
+        self.ttl = ttl
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._memory = TLRUCache(maxsize=max_bytes, ttu=_expires_at, timer=time.time, getsizeof=_sizeof)
+
+    def get(self, key, default=None):
+        """Return the cached value for `key`, or `default` on a miss."""
+        with self._lock:
+            entry = self._memory.get(key)
+        encoded = _MISSING if entry is None else entry[0]
+
+        if encoded is _MISSING and self.backend is not None:
+            row = self.backend.get(self.name, key)
+            if row is not None:
+                encoded, expires_at = row
+                self._remember(key, encoded, expires_at)
+
+        with self._lock:
+            if encoded is _MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+        return json.loads(encoded)
+
+    def set(self, key, value):
+        encoded = json.dumps(value)
+        expires_at = time.time() + self.ttl
+        self._remember(key, encoded, expires_at)
+        if self.backend is not None:
+            self.backend.set(self.name, key, encoded, expires_at)
+
+    def _remember(self, key, encoded, expires_at):
+        with self._lock:
+            try:
+                self._memory[key] = (encoded, expires_at)
+            except ValueError:
+                pass  # Larger than the whole budget; keep it on disk only
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._memory),
+                "bytes": self._memory.currsize,
+            }
+
+
+disk_backend = SQLiteBackend(CACHE_DB_PATH) if CACHE_DB_PATH else None
+
+places_cache = ProviderCache("places", PROVIDER_TTLS["places"], backend=disk_backend)
+yelp_cache = ProviderCache("yelp", PROVIDER_TTLS["yelp"], backend=disk_backend)
+geocode_cache = ProviderCache("geocode", PROVIDER_TTLS["geocode"], backend=disk_backend)
+
+recommendation_cache = ProviderCache("recommendations", RESPONSE_TTLS["recommendations"],
+                                     max_bytes=MAX_RESPONSE_CACHE_BYTES, backend=disk_backend)
+dish_cache = ProviderCache("dishes", RESPONSE_TTLS["dishes"],
+                           max_bytes=MAX_RESPONSE_CACHE_BYTES, backend=disk_backend)
+
+PROVIDER_CACHES = [places_cache, yelp_cache, geocode_cache]
+RESPONSE_CACHES = [recommendation_cache, dish_cache]
+
+
+def places_key(keyword, latitude, longitude, radius):
+    return f"{geohash(latitude, longitude)}|{normalize_keyword(keyword)}|{int(radius)}"
+
+
+def yelp_key(term, latitude, longitude):
+    return f"{geohash(latitude, longitude)}|{normalize_keyword(term)}"
+
+
+def geocode_key(latitude, longitude):
+    return geohash(latitude, longitude, CITY_GEOHASH_PRECISION)
+
+
+def recommendation_key(preferences, goal, allergies, available_ingredients):
+    return request_key(
+        preferences=canonical_list(preferences),
+        goal=normalize_keyword(goal),
+        allergies=canonical_list(allergies),
+        available_ingredients=canonical_list(available_ingredients),
+    )
+
+
+def dish_types_key(preferences, goal, allergies):
+    return request_key(
+        preferences=canonical_list(preferences),
+        goal=normalize_keyword(goal),
+        allergies=canonical_list(allergies),
+    )
+
+
+def cache_stats():
+    """Hit/miss counters for every cache, keyed by cache name."""
+    return {cache.name: cache.stats() for cache in PROVIDER_CACHES + RESPONSE_CACHES}
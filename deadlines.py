@@ -0,0 +1,182 @@
+"""Per-request latency budgets and admission control for the recommendation endpoints.
+
+A request's deadline lives in a context variable, so it follows the request
+into asyncio tasks and (via `run_blocking`) into the lookup threads. The
+outbound layer caps every provider timeout at the time left and refuses to
+start calls once the deadline has passed, so a slow stage is dropped and the
+pipeline falls back to whatever it already has.
+
+`AdmissionMiddleware` lets only so many requests run at once and queues a few
+more; everything beyond that is turned away with 429 and Retry-After instead
+of slowing every request down.
+"""
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import httpx
+from starlette.datastructures import Headers
+
+from api_responses import FastJSONResponse
+
+BUDGET_HEADER = "X-Request-Budget-Ms"
+DEFAULT_BUDGET = float(os.environ.get("REQUEST_BUDGET_SECONDS", 20))  # When the client sends no budget
+MAX_BUDGET = 60  # Seconds; larger client budgets are capped
+MIN_BUDGET = 0.1
+
+MAX_ACTIVE_REQUESTS = int(os.environ.get("MAX_ACTIVE_REQUESTS", 16))
+MAX_QUEUED_REQUESTS = int(os.environ.get("MAX_QUEUED_REQUESTS", 32))
+SERVICE_TIME_SMOOTHING = 0.2  # Weight of the latest request in the moving average used for Retry-After
+
+_deadline = ContextVar("deadline", default=None)  # time.monotonic() value, None means unlimited
+
+_exceeded = Counter()  # provider -> calls dropped because the request ran out of time
+_exceeded_lock = threading.Lock()
+
+
+class DeadlineExceeded(Exception):
+    """The request's latency budget ran out before (or while) a provider call could finish."""
+
+
+def parse_budget(header_value, default=DEFAULT_BUDGET):
+    """Budget in seconds from a millisecond header value, clamped to [MIN_BUDGET, MAX_BUDGET]."""
+    try:
+        seconds = float(header_value) / 1000
+    except (TypeError, ValueError):
+        return default
+    return min(max(seconds, MIN_BUDGET), MAX_BUDGET)
+
+
+@contextmanager
+def request_budget(seconds):
+    """Run the block under a deadline `seconds` from now (None for no deadline)."""
+    token = _deadline.set(None if seconds is None else time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining():
+    """Seconds left in the current request's budget, or None if it has none."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def expired():
+    left = remaining()
+    return left is not None and left <= 0
+
+
+def check(provider):
+    """Raise DeadlineExceeded (and count it against `provider`) if the budget is spent."""
+    if expired():
+        record_exceeded(provider)
+        raise DeadlineExceeded(f"request budget spent before calling {provider}")
+
+
+def record_exceeded(provider):
+    with _exceeded_lock:
+        _exceeded[provider] += 1
+
+
+def exceeded_counts():
+    """`{provider: calls dropped for lack of budget}` since startup."""
+    with _exceeded_lock:
+        return dict(_exceeded)
+
+
+def capped_timeout(timeout):
+    """`timeout` (an httpx.Timeout) with every phase shortened to the time left in the budget."""
+    left = remaining()
+    if left is None:
+        return timeout
+    left = max(left, 0.001)
+
+    def cap(value):
+        return left if value is None else min(value, left)
+
+    return httpx.Timeout(connect=cap(timeout.connect), read=cap(timeout.read),
+                         write=cap(timeout.write), pool=cap(timeout.pool))
+
+
+class AdmissionQueue:
+    """At most `max_active` requests at once, up to `max_queued` more waiting for a slot."""
+
+    def __init__(self, max_active=MAX_ACTIVE_REQUESTS, max_queued=MAX_QUEUED_REQUESTS):
+        self.max_active = max_active
+        self.max_queued = max_queued
+        self._slots = asyncio.Semaphore(max_active)
+        self.active = 0
+        self.queued = 0
+        self.rejected = 0
+        self._service_time = 1.0  # Moving average of seconds per admitted request
+
+    async def acquire(self):
+        """Wait for a slot until the request's deadline; False if it was shed instead."""
+        if self._slots.locked() and self.queued >= self.max_queued:
+            self.rejected += 1
+            return False
+        self.queued += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), remaining())
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            return False
+        finally:
+            self.queued -= 1
+        self.active += 1
+        return True
+
+    def release(self, service_time):
+        self.active -= 1
+        self._slots.release()
+        self._service_time += SERVICE_TIME_SMOOTHING * (service_time - self._service_time)
+
+    def retry_after(self):
+        """Whole seconds until the current queue should have drained."""
+        return max(1, math.ceil(self._service_time * (self.queued + 1) / self.max_active))
+
+    def stats(self):
+        return {"active": self.active, "queued": self.queued, "rejected": self.rejected}
+
+
+class AdmissionMiddleware:
+    """Admission control and latency budgets for requests to `paths`.
+
+    The budget comes from the X-Request-Budget-Ms header (or `default_budget`)
+    and starts counting on arrival, so time spent queued is part of it. The
+    slot is held until the response is fully sent, streams included.
+    """
+
+    def __init__(self, app, queue, paths, default_budget=DEFAULT_BUDGET):
+        self.app = app
+        self.queue = queue
+        self.paths = set(paths)
+        self.default_budget = default_budget
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        budget = parse_budget(Headers(scope=scope).get(BUDGET_HEADER), self.default_budget)
+        with request_budget(budget):
+            if not await self.queue.acquire():
+                response = FastJSONResponse(
+                    {"error": "Too many requests in progress, please retry later."}, status_code=429,
+                    headers={"Retry-After": str(self.queue.retry_after())},
+                )
+                await response(scope, receive, send)
+                return
+
+            start = time.monotonic()
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                self.queue.release(time.monotonic() - start)
@@ -1,12 +1,52 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Query, Request
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Match
 from pydantic import BaseModel
-import requests
-import openai
 from typing import List, Optional
-from thefuzz import fuzz
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+import asyncio
+import contextvars
+import functools
+import json
+import os
 import re
-
-app = FastAPI()
+import threading
+import time
+
+import deadlines
+import http_pool
+import profiling
+from api_responses import CompressionMiddleware, FastJSONResponse, compact_restaurants, conditional_response, dumps
+from batch import MAX_BATCH_CONCURRENCY, read_records, run_batch
+from cache import (cache_stats, canonical_list, canonical_request, dish_cache, dish_types_key, geocode_cache,
+                   geocode_key, places_cache, places_key, recommendation_cache, recommendation_key,
+                   request_key, yelp_cache, yelp_key)
+from fridge_store import FridgeStore
+from nutrition_store import NUTRIENT_KEYS, NutritionStore, canonical_dish_name, is_valid_nutrients
+from recipe_index import RecipeIndex, plan_advice
+from metrics import register_collector, render, request_latency, requests_in_flight, timed
+from deadlines import AdmissionMiddleware, AdmissionQueue, DeadlineExceeded, exceeded_counts
+from outbound import PROVIDERS, breaker_states, call, get_json, provider_timeout
+from profiling import ProfilingMiddleware
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """Open the shared outbound connection pool with the app and close it on shutdown."""
+    global openai_client
+    http_pool.get_client()
+    yield
+    openai_client = None  # Bound to the pool being closed
+    http_pool.close()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
+app.add_middleware(CompressionMiddleware)  # gzip/brotli for large buffered responses; streams pass through
+app.add_middleware(ProfilingMiddleware, paths=("/recommend",))  # Only with PROFILING_TOKEN set, see profiling.py
+# Latency budget per request, and 429 + Retry-After once too many recommendations are in progress
+admission = AdmissionQueue()
+app.add_middleware(AdmissionMiddleware, queue=admission, paths=("/recommend", "/recommend/stream"))
 
 # Replace with your OpenAI and Google API Keys
 OPENAI_API_KEY = "OPENAI_API_KEY"
@@ -14,9 +54,35 @@ YOUTUBE_API_KEY = "YOUTUBE_API_KEY"
 GOOGLE_API_KEY = "GOOGLE_API_KEY"
 YELP_API_KEY = "YELP_API_KEY"
 
-openai.api_key = OPENAI_API_KEY
+# Provider endpoints, overridable so benchmarks can point at local stand-ins
+OPENAI_BASE_URL = os.environ.get("OPENAI_BASE_URL")  # None means the SDK default
+GOOGLE_API_BASE_URL = os.environ.get("GOOGLE_API_BASE_URL", "https://maps.googleapis.com")
+YELP_API_BASE_URL = os.environ.get("YELP_API_BASE_URL", "https://api.yelp.com")
+YOUTUBE_API_BASE_URL = os.environ.get("YOUTUBE_API_BASE_URL", "https://www.googleapis.com")
+
+# One keep-alive pool per provider host, sized from the provider settings
+http_pool.configure({
+    OPENAI_BASE_URL or "https://api.openai.com/v1": PROVIDERS["openai"]["max_connections"],
+    GOOGLE_API_BASE_URL: PROVIDERS["google"]["max_connections"],
+    YELP_API_BASE_URL: PROVIDERS["yelp"]["max_connections"],
+    YOUTUBE_API_BASE_URL: PROVIDERS["youtube"]["max_connections"],
+})
+
+openai_client = None  # Created lazily by get_openai_client()
+restaurant_index = None  # Created lazily by get_restaurant_index()
+restaurant_index_lock = threading.Lock()
 video_url = ''
 
+MAX_CONCURRENT_LOOKUPS = 8  # Upper bound on simultaneous per-request provider lookups
+RESTAURANTS_PER_DISH = 5  # Restaurants returned per dish type, best ranked first
+LOOKUP_THREADS = 32  # Worker threads shared by all requests for blocking provider calls
+
+lookup_executor = ThreadPoolExecutor(max_workers=LOOKUP_THREADS, thread_name_prefix="lookup")
+nutrition_store = NutritionStore()
+recipe_index = RecipeIndex.load()
+fridge_store = FridgeStore()
+fridge_store.import_legacy_file()  # One-time move of the old shared fridge.json into the "default" fridge
+
 def extract_english(text):
     """Remove non-English characters from a restaurant name."""
     return re.sub(r'[^A-Za-z0-9\s]', '', text)
@@ -24,7 +90,12 @@ def extract_english(text):
 
 def search_yelp(dish, latitude, longitude):
     """Search Yelp API for restaurants serving a given dish."""
-    url = "https://api.yelp.com/v3/businesses/search"
+    cache_key = yelp_key(dish, latitude, longitude)
+    cached = yelp_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    url = f"{YELP_API_BASE_URL}/v3/businesses/search"
     headers = {"Authorization": f"Bearer {YELP_API_KEY}"}
     params = {
         "term": dish,
@@ -34,7 +105,12 @@ def search_yelp(dish, latitude, longitude):
         "limit": 10  # Increase results for better matching
     }
 
-    response = requests.get(url, headers=headers, params=params).json()
+    try:
+        with timed("yelp_search"):
+            response = get_json("yelp", url, params=params, headers=headers)
+    except Exception as e:
+        print(f"⚠️ Yelp search failed: {e}")
+        return {}  # Restaurants fall back to Yelp search links
 
     if "businesses" not in response:
         return {}
@@ -46,6 +122,7 @@ def search_yelp(dish, latitude, longitude):
             "address": " ".join(business["location"].get("display_address", []))  # Convert address to string
         }
 
+    yelp_cache.set(cache_key, yelp_data)
     return yelp_data
 
 
@@ -58,11 +135,22 @@ class DietRequest(BaseModel):
     latitude: Optional[float] = None
     longitude: Optional[float] = None
     eat_location: str
+    fresh: bool = False  # Skip cached answers and ask the LLM for a new suggestion
+
+
+class FridgeUpdate(BaseModel):
+    items: List[str]
 
 def search_youtube(query):
     """Search YouTube and return a valid video link."""
-    url = f"https://www.googleapis.com/youtube/v3/search?part=snippet&q={query}&type=video&key={YOUTUBE_API_KEY}&maxResults=1"
-    response = requests.get(url).json()
+    url = f"{YOUTUBE_API_BASE_URL}/youtube/v3/search"
+    params = {"part": "snippet", "q": query, "type": "video", "key": YOUTUBE_API_KEY, "maxResults": 1}
+    try:
+        with timed("youtube_search"):
+            response = get_json("youtube", url, params=params)
+    except Exception as e:
+        print(f"⚠️ YouTube search failed: {e}")
+        return None
 
     if "items" in response and response["items"]:
         video_id = response["items"][0]["id"]["videoId"]
@@ -71,52 +159,216 @@ def search_youtube(query):
 ##
 
 
-def generate_nutritional_data(dish_name):
-    """Generate a short nutritional summary and nutrient breakdown for the dish."""
-    client = openai.OpenAI(api_key=OPENAI_API_KEY)
+def get_openai_client():
+    """Return the process-wide OpenAI client, creating it on first use."""
+    global openai_client
+    if openai_client is None:
+        import openai  # Heavy; only loaded once a request actually needs the LLM
+
+        openai.api_key = OPENAI_API_KEY
+        # Retries are handled by the outbound layer, not by the SDK; connections come from the shared pool
+        openai_client = openai.OpenAI(api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL, max_retries=0,
+                                      timeout=provider_timeout("openai"), http_client=http_pool.get_client())
+    return openai_client
+
+
+def get_restaurant_index():
+    """Return the process-wide restaurant index, loading it (and NumPy) on first use."""
+    global restaurant_index
+    with restaurant_index_lock:
+        if restaurant_index is None:
+            from restaurant_index import RestaurantIndex
+
+            restaurant_index = RestaurantIndex()
+    return restaurant_index
+
+
+def create_completion(prompt, max_tokens=100):
+    """Run a GPT-4 chat completion and return its text.
+
+    Goes through the outbound layer, so identical prompts already in flight share
+    one request. Raises if OpenAI fails or its circuit breaker is open.
+    """
+    def complete():
+        return get_openai_client().chat.completions.create(
+            model="gpt-4",
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=max_tokens,
+            timeout=deadlines.capped_timeout(provider_timeout("openai"))
+        )
+
+    with timed("llm_completion"):
+        response = call("openai", complete, key=("gpt-4", prompt, max_tokens))
+    return response.choices[0].message.content
+
+
+def stream_completion(prompt, max_tokens=100):
+    """Run a GPT-4 chat completion in streaming mode and yield its text as it is generated.
+
+    Opening the stream goes through the outbound layer (rate limit, breaker,
+    retries); a failure once tokens are flowing is raised to the caller. If the
+    request's budget runs out mid-stream, reading stops and DeadlineExceeded is
+    raised after the text generated so far.
+    Streams are never shared between callers, so there is no coalescing.
+    """
+    def open_stream():
+        return get_openai_client().chat.completions.create(
+            model="gpt-4",
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=max_tokens,
+            stream=True,
+            timeout=deadlines.capped_timeout(provider_timeout("openai"))
+        )
 
-    prompt = f"""
-    Provide the approximate nutritional breakdown for "{dish_name}" per 500 grams.
-    Include:
+    stream = call("openai", open_stream)
+    cut_short = False
+    try:
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+            if deadlines.expired():
+                cut_short = True
+                break
+    except Exception:
+        if not deadlines.expired():
+            raise
+        cut_short = True  # A read timed out at the deadline
+    finally:
+        stream.close()
+    if cut_short:  # What was yielded so far stands
+        deadlines.record_exceeded("openai")
+        raise DeadlineExceeded("request budget spent while GPT-4 was still writing")
+
+
+def iter_lines(chunks):
+    """Reassemble text chunks into lines, yielding each line as soon as its newline arrives."""
+    buffer = ""
+    for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split("\n")
+        yield from lines
+    if buffer:
+        yield buffer
+
+
+def build_nutrition_prompt(dish_names):
+    dishes = "\n".join(f"- {name}" for name in dish_names)
+    return f"""
+    Provide the approximate nutritional breakdown per 500 grams for each of these dishes:
+    {dishes}
+
+    For each dish include:
     - Calories
     - Protein (grams)
     - Carbohydrates (grams)
     - Fat (grams)
 
-    Respond in **JSON format**, example:
-    {{
-        "calories": 645,
-        "protein": 49,
-        "carbohydrates": 34,
-        "fat": 34
-    }}
+    Respond with a **compact JSON array only** (no line breaks or indentation), one object per dish,
+    with "dish" spelled exactly as listed above, example:
+    [{{"dish":"Grilled Chicken Salad","calories":645,"protein":49,"carbohydrates":34,"fat":34}}]
     """
 
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=100
-        )
-        nutrients = response.choices[0].message.content.strip()
 
-        # Ensure the response is formatted correctly
-        import json
+NUTRITION_TOKENS_PER_DISH = 80  # One compact object (~40 tokens) with room for a long dish name
+NUTRITION_TOKENS_OVERHEAD = 30
+
+
+def parse_nutrition_batch(text, dish_names):
+    """Parse a JSON array of nutrient objects into a list aligned with `dish_names`.
+
+    Objects are matched to dishes by their "dish" field (compared with
+    `canonical_dish_name`, so "1. Avocado Toast" matches "Avocado Toast"), not
+    by position, so a reordered or incomplete answer never attaches one dish's
+    nutrients to another. Dishes without a usable object get None.
+    """
+    text = text.strip()
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        # Tolerate prose around the array
+        start, end = text.find("["), text.rfind("]")
         try:
-            nutrient_data = json.loads(nutrients)
+            data = json.loads(text[start:end + 1]) if start != -1 and end > start else None
         except json.JSONDecodeError:
-            return None  # Return None if parsing fails
+            data = None
+
+    if isinstance(data, dict):
+        data = [data]
+    if not isinstance(data, list):
+        return [None] * len(dish_names)
+
+    by_dish = {}
+    for item in data:
+        if isinstance(item, dict) and is_valid_nutrients(item):
+            by_dish.setdefault(canonical_dish_name(str(item.get("dish", ""))),
+                               {key: item[key] for key in NUTRIENT_KEYS})
+    return [by_dish.get(canonical_dish_name(name)) for name in dish_names]
+
 
-        return nutrient_data
+def generate_nutritional_data_batch(dish_names):
+    """Nutrient breakdowns for several dishes, in input order.
 
+    Dishes already in the nutrition store are served locally; the rest are
+    generated with a single GPT-4 request. Unparseable answers come back as
+    None and are never stored.
+    """
+    results = [nutrition_store.get(name) for name in dish_names]
+    missing = [i for i, data in enumerate(results) if data is None]
+    if not missing:
+        return results
+
+    missing_names = [dish_names[i] for i in missing]
+    max_tokens = NUTRITION_TOKENS_OVERHEAD + NUTRITION_TOKENS_PER_DISH * len(missing)
+    try:
+        generated = parse_nutrition_batch(create_completion(build_nutrition_prompt(missing_names), max_tokens),
+                                          missing_names)
     except Exception as e:
         print(f"⚠️ Failed to generate nutrition data: {e}")
-        return None
+        return results
+
+    for i, nutrients in zip(missing, generated):
+        if nutrients is not None:
+            nutrition_store.put(dish_names[i], nutrients)
+        results[i] = nutrients
+    return results
+
+
+def format_candidates(candidates):
+    lines = []
+    for c in candidates:
+        missing = f"; missing {', '.join(c['missing'])}" if c["missing"] else ""
+        lines.append(f"- {c['meal'].title()}: {c['name']} (uses {', '.join(c['ingredients'])}{missing})")
+    return "\n".join(lines)
+
+
+def build_recommendation_prompt(preferences, goal, allergies, available_ingredients, candidates=None):
+    if candidates:
+        # The shortlist already fits the fridge, so the (possibly long) raw ingredient
+        # list is left out of the prompt; the allergens stay in as a second check
+        return f"""
+        You are a professional nutritionist and meal planner. Based on the following dietary requirements, choose three meal options (breakfast, lunch, and dinner) from the candidate dishes below. The candidates are ranked by how much of each recipe the user's fridge already covers; never choose one that contains an allergen to avoid. Each recommendation should be a **specific dish name only**, without numbering or extra text.
 
-def generate_recommendation(preferences, goal, allergies, available_ingredients):
-    client = openai.OpenAI(api_key=OPENAI_API_KEY)
-    
-    prompt = f"""
+        - **Dietary Preferences:** {', '.join(preferences) if preferences else 'None'}
+        - **Health Goal:** {goal}
+        - **Allergens to Avoid:** {', '.join(allergies) if allergies else 'None'}
+
+        ### **Candidate Dishes:**
+{format_candidates(candidates)}
+
+        After listing the three meal names, provide a short **separate** paragraph with dietary advice of no more than **two sentences**, specific to the chosen dishes.
+
+        ### **Response Format:**
+        Provide exactly **three dish names**, one per line, in breakfast, lunch, dinner order. Then, on the fifth line, the advice.
+
+        Example Response:
+        Veggie Omelette
+        Grilled Chicken Salad
+        Lentil Soup
+
+        Advice: This meal plan is well-balanced, providing lean protein and fiber. Consider adding more leafy greens for extra vitamins.
+        """
+
+    return f"""
         You are a professional nutritionist and meal planner. Based on the following dietary requirements, recommend three meal options (breakfast, lunch, and dinner) that can be made using the available ingredients. Each recommendation should be a **specific dish name only**, without numbering or extra text.
 
         - **Dietary Preferences:** {', '.join(preferences) if preferences else 'None'}
@@ -143,54 +395,258 @@ def generate_recommendation(preferences, goal, allergies, available_ingredients)
         4. Advice: This meal plan is well-balanced, providing healthy fats, lean protein, and fiber. Consider adding more leafy greens for extra vitamins.
         """
 
+
+ADVICE_LINE = 4  # Completions list three dishes, a blank line, then the advice
+
+
+def match_recipes(preferences, goal, allergies, available_ingredients, fresh=False):
+    """`(plan, shortlist)` from the recipe corpus: a full plan that needs no LLM (or None), and the LLM candidates.
+
+    If any allergy is something the index cannot exclude reliably, neither is
+    used and GPT-4 gets the raw prompt with the allergies spelled out. A
+    preference no recipe is tagged with rules out the no-LLM plan, so GPT-4
+    weighs it when choosing from the shortlist.
+    """
+    if recipe_index.unmapped_allergies(allergies):
+        return None, []
+    with timed("recipe_match"):
+        candidates = recipe_index.candidates(available_ingredients, allergies, preferences, goal)
+        if fresh or recipe_index.unmapped_preferences(preferences):
+            plan = None
+        else:
+            plan = recipe_index.confident_plan(candidates, preferences)
+    return plan, recipe_index.shortlist(candidates)
+
+
+async def stream_meal_choices(preferences, goal, allergies, available_ingredients, fresh=False):
+    """Pick the three Home dishes and the advice: yield `(index, dish_name)` as each dish line completes, then `(None, advice)`.
+
+    If the fridge fully covers an allergen-free recipe for every meal, the plan
+    comes straight from the local recipe corpus with no LLM call. Otherwise GPT-4
+    chooses from a short candidate list (or from the raw ingredients when the
+    corpus has nothing that fits), and each dish is handed on the moment its
+    line is finished. `fresh` always asks GPT-4 for a new idea.
+    """
+    plan, shortlist = match_recipes(preferences, goal, allergies, available_ingredients, fresh)
+    if plan is not None:
+        for index, recipe in enumerate(plan):
+            yield index, recipe["name"]
+        yield None, plan_advice(goal)
+        return
+
+    prompt = build_recommendation_prompt(preferences, goal, allergies, available_ingredients, shortlist)
+    index = 0
+    async for line in stream_lines(prompt):
+        if index == 0 and not line.strip():
+            continue  # Leading blank lines before the first dish
+        if index < len(MEAL_NAMES):
+            yield index, line
+        elif index == ADVICE_LINE:
+            yield None, line
+        index += 1
+
+
+MEAL_NAMES = ("breakfast", "lunch", "dinner")
+
+
+def is_complete_meal_plan(recommendations):
+    """Only full plans are worth caching; partial ones come from a failed lookup."""
+    return all(
+        recommendations.get(meal, {}).get("dish") and recommendations[meal].get("nutrients")
+        for meal in MEAL_NAMES
+    )
+
+
+def is_complete_response(response):
+    """True for a /recommend result worth keeping: a full meal plan or at least one restaurant."""
+    if "recommendations" in response:
+        return is_complete_meal_plan(response["recommendations"])
+    return bool(response.get("restaurants"))
+
+
+def bind_request(fn, *args):
+    """`fn(*args)` as a callable for a worker thread, carrying the request's deadline and profiling along."""
+    bound = functools.partial(contextvars.copy_context().run, fn, *args)
+    session = profiling.current()
+    return bound if session is None else functools.partial(session.run, bound)
+
+
+async def run_blocking(fn, *args):
+    """Run a blocking provider call on the shared lookup pool without stalling the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(lookup_executor, bind_request(fn, *args))
+
+
+async def run_limited(semaphore, fn, *args):
+    """`run_blocking`, but only while holding `semaphore`."""
+    async with semaphore:
+        return await run_blocking(fn, *args)
+
+
+async def stream_lines(prompt, max_tokens=100):
+    """Async iterator over the lines of a streamed GPT-4 completion, each yielded as soon as it is complete.
+
+    The stream is read on the lookup pool so the event loop keeps serving other
+    work in the meantime; errors from the stream are raised here.
+    """
+    loop = asyncio.get_running_loop()
+    lines = asyncio.Queue()
+    stopped = threading.Event()
+
+    def read():
+        with timed("llm_stream"):
+            for line in iter_lines(stream_completion(prompt, max_tokens)):
+                if stopped.is_set():
+                    break  # The consumer went away; close the stream early
+                loop.call_soon_threadsafe(lines.put_nowait, line)
+
+    reader = loop.run_in_executor(lookup_executor, bind_request(read))
+    reader.add_done_callback(lambda _: lines.put_nowait(reader))  # Queued after every line
     try:
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=100
-        )
+        while True:
+            line = await lines.get()
+            if line is reader:
+                break
+            yield line
+        reader.result()
+    finally:
+        stopped.set()
+        reader.add_done_callback(lambda f: f.cancelled() or f.exception())  # Nobody is left to see late errors
+
+
+async def run_as_available(items, start):
+    """Run coroutine `start(item)` for each item of the async iterator `items` the moment it arrives.
+
+    Results are yielded in completion order, including while `items` is still
+    producing, so downstream lookups overlap with a slow source such as a
+    streamed completion. Errors from `items` or any task are raised here, and
+    unfinished tasks are cancelled when the caller stops iterating.
+    """
+    finished = asyncio.Queue()
+    tasks = []
+
+    async def feed():
+        async for item in items:
+            task = asyncio.ensure_future(start(item))
+            task.add_done_callback(finished.put_nowait)
+            tasks.append(task)
+
+    feeder = asyncio.ensure_future(feed())
+    feeder.add_done_callback(finished.put_nowait)
+    total = None  # Known once the feeder is done
+    done = 0
+    try:
+        while total is None or done < total:
+            task = await finished.get()
+            if task is feeder:
+                feeder.result()
+                total = len(tasks)
+                continue
+            done += 1
+            yield task.result()
+    finally:
+        for task in tasks + [feeder]:
+            task.cancel()
+
+
+async def stream_meals(preferences, goal, allergies, available_ingredients, fresh=False,
+                       max_concurrency=MAX_CONCURRENT_LOOKUPS):
+    """Yield the Home plan as events: the advice and each meal, as soon as each is ready.
+
+    A dish's YouTube search and nutrition-store lookup start the moment its
+    line of the streamed completion is parsed, while GPT-4 is still writing the
+    remaining dishes and the advice. Dishes missing from the nutrition store
+    share one batched request, started once all dish names are known.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    dish_names = []
+    names_known = asyncio.get_running_loop().create_future()
 
-        response_text = response.choices[0].message.content.strip().split("\n")
-
-        # Extract dish names (first three lines) and advice (last line)
-        dish_names = response_text[:3] if len(response_text) >= 3 else []
-        advice_text = response_text[4] if len(response_text) > 4 else ""
-        youtube_links = [search_youtube(dish) for dish in dish_names]
-        nutrition_data = [generate_nutritional_data(dish) for dish in dish_names]
-
-        return {
-            "breakfast": {
-                "dish": dish_names[0],
-                "youtube_link": youtube_links[0],
-                "nutrients": nutrition_data[0]
-            } if dish_names else {},
-
-            "lunch": {
-                "dish": dish_names[1],
-                "youtube_link": youtube_links[1],
-                "nutrients": nutrition_data[1]
-            } if len(dish_names) > 1 else {},
-
-            "dinner": {
-                "dish": dish_names[2],
-                "youtube_link": youtube_links[2],
-                "nutrients": nutrition_data[2]
-            } if len(dish_names) > 2 else {},
-            
-            "advice": {"text": advice_text} if advice_text else {}  # Returns {} if no advice
-        }
+    async def missing_nutrition():
+        return await run_limited(semaphore, generate_nutritional_data_batch, await names_known)
 
-    except Exception as e:
-        print(f"OpenAI API call failed: {e}")
+    nutrition_task = asyncio.ensure_future(missing_nutrition())
+
+    async def choices():
+        try:
+            async for index, text in stream_meal_choices(preferences, goal, allergies, available_ingredients, fresh):
+                if index is not None:
+                    dish_names.append(text)
+                    if len(dish_names) == len(MEAL_NAMES):
+                        names_known.set_result(list(dish_names))
+                yield index, text
+        except DeadlineExceeded as e:
+            print(f"⚠️ {e}; returning the meals chosen so far")
+        if not names_known.done():
+            names_known.set_result(list(dish_names))
+
+    async def enrich(choice):
+        index, text = choice
+        if index is None:
+            return {"event": "advice", "data": {"text": text}}
+        youtube_task = asyncio.ensure_future(run_limited(semaphore, search_youtube, text))
+        nutrients = await run_blocking(nutrition_store.get, text)
+        if nutrients is None:
+            nutrients = (await nutrition_task)[index]
+        meal = {"dish": text, "youtube_link": await youtube_task, "nutrients": nutrients}
+        return {"event": MEAL_NAMES[index], "data": meal}
+
+    try:
+        async for event in run_as_available(choices(), enrich):
+            if event["event"] != "advice" or event["data"]["text"]:
+                yield event
+    finally:
+        nutrition_task.cancel()
+
+
+async def generate_recommendation_async(preferences, goal, allergies, available_ingredients, fresh=False,
+                                        max_concurrency=MAX_CONCURRENT_LOOKUPS):
+    """The Home meal plan as one dict, collected from `stream_recommendation`; {} if nothing could be generated."""
+    received = {}
+    async for event in stream_recommendation(preferences, goal, allergies, available_ingredients, fresh,
+                                             max_concurrency):
+        if event["event"] != "error":
+            received[event["event"]] = event["data"]
+    if not received:
         return {}
+    return {name: received.get(name, {}) for name in MEAL_NAMES + ("advice",)}
+
+
+async def stream_recommendation(preferences, goal, allergies, available_ingredients, fresh=False,
+                                max_concurrency=MAX_CONCURRENT_LOOKUPS):
+    """Yield the Home meal plan as events, each meal and the advice as soon as it is ready."""
+    preferences, allergies, available_ingredients = map(canonical_list, (preferences, allergies, available_ingredients))
+    cache_key = recommendation_key(preferences, goal, allergies, available_ingredients)
+    cached = None if fresh else recommendation_cache.get(cache_key)
+    if cached is not None:
+        for name in MEAL_NAMES + ("advice",):
+            if cached.get(name):
+                yield {"event": name, "data": cached[name]}
+        return
+
+    received = {}
+    try:
+        async for event in stream_meals(preferences, goal, allergies, available_ingredients, fresh, max_concurrency):
+            received[event["event"]] = event["data"]
+            yield event
+    except Exception as e:
+        print(f"Meal recommendation failed: {e}")
+        message = "Some meal details could not be loaded." if received else "Failed to generate recommendations."
+        yield {"event": "error", "data": {"message": message}}
+        return
+
+    recommendations = {name: received.get(name, {}) for name in MEAL_NAMES + ("advice",)}
+    if is_complete_meal_plan(recommendations):
+        recommendation_cache.set(cache_key, recommendations)
         
 
 # ✅ Use OpenAI to recommend dish types for eating out
-def recommend_dishes(preferences, goal, allergies):
-    """Generate a list of dish types that align with the user's health goals and dietary restrictions."""
-    client = openai.OpenAI(api_key=OPENAI_API_KEY)
+DISH_TYPES_PER_REQUEST = 3
+DEFAULT_DISH_TYPES = ("Healthy Salad", "Grilled Chicken", "Steamed Fish")
+
 
-    prompt = f"""
+def build_dish_types_prompt(preferences, goal, allergies):
+    return f"""
         You are a professional nutritionist. Based on the user's preferences, health goal, and allergies, recommend three dish types that would be best suited when dining at a restaurant.
 
         - **Dietary Preferences:** {', '.join(preferences) if preferences else 'None'}
@@ -200,37 +656,75 @@ def recommend_dishes(preferences, goal, allergies):
         Provide exactly **three dish types**, one per line (e.g., "Grilled Salmon", "Vegan Stir Fry", "Quinoa Salad").
     """
 
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=100
-        )
 
-        dish_types = response.choices[0].message.content.strip().split("\n")
-        return dish_types[:3]  # Return top 3 dish types
+async def stream_dish_types(preferences, goal, allergies, fresh=False):
+    """Three dish types to look for when eating out, each yielded as soon as GPT-4 finishes its line.
 
+    If the completion fails part-way, the default dish types fill in whatever is
+    still missing, so callers always get three.
+    """
+    preferences, allergies = canonical_list(preferences), canonical_list(allergies)
+    cache_key = dish_types_key(preferences, goal, allergies)
+    cached = None if fresh else dish_cache.get(cache_key)
+    if cached is not None:
+        for dish in cached:
+            yield dish
+        return
+
+    dish_types = []
+    try:
+        async for line in stream_lines(build_dish_types_prompt(preferences, goal, allergies)):
+            if not line.strip():
+                continue
+            dish_types.append(line)
+            yield line
+            if len(dish_types) == DISH_TYPES_PER_REQUEST:
+                break
     except Exception as e:
         print(f"⚠️ OpenAI API call failed: {e}")
-        return ["Healthy Salad", "Grilled Chicken", "Steamed Fish"]  # Default fallback
+        for dish in DEFAULT_DISH_TYPES[len(dish_types):]:
+            yield dish
+        return
+
+    if dish_types:
+        dish_cache.set(cache_key, dish_types)
+
 
 
+UNKNOWN_CITY = "Unknown Location"
+
 
 def get_city_name(latitude, longitude):
     """Get the city name from latitude and longitude using Google Geocoding API."""
-    url = f"https://maps.googleapis.com/maps/api/geocode/json?latlng={latitude},{longitude}&key={GOOGLE_API_KEY}"
-    response = requests.get(url).json()
+    cache_key = geocode_key(latitude, longitude)
+    cached = geocode_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    url = f"{GOOGLE_API_BASE_URL}/maps/api/geocode/json?latlng={latitude},{longitude}&key={GOOGLE_API_KEY}"
+    try:
+        with timed("geocode"):
+            response = get_json("google", url)
+    except Exception as e:
+        print(f"⚠️ Geocoding failed: {e}")
+        return UNKNOWN_CITY
 
     if "results" in response and response["results"]:
         for component in response["results"][0]["address_components"]:
             if "locality" in component["types"]:  # Look for city name
+                geocode_cache.set(cache_key, component["long_name"])
                 return component["long_name"]
 
-    return "Unknown Location"  # Fallback if geocoding fails
+    return UNKNOWN_CITY  # Fallback if geocoding fails
+
+def search_places(dish, latitude, longitude, radius=5000):
+    """Query Google Places for restaurants serving a dish and return the raw results."""
+    cache_key = places_key(dish, latitude, longitude, radius)
+    cached = places_cache.get(cache_key)
+    if cached is not None:
+        return cached
 
-def search_restaurants(dish, latitude, longitude, radius=5000):
-    """Search Google Places API for restaurants and generate Yelp search links dynamically."""
-    url = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
+    url = f"{GOOGLE_API_BASE_URL}/maps/api/place/nearbysearch/json"
     params = {
         "location": f"{latitude},{longitude}",
         "radius": radius,
@@ -239,31 +733,31 @@ def search_restaurants(dish, latitude, longitude, radius=5000):
         "key": GOOGLE_API_KEY
     }
 
-    response = requests.get(url, params=params).json()
-    
-    if "results" not in response or not response["results"]:
+    try:
+        with timed("places_search"):
+            response = get_json("google", url, params=params)
+    except Exception as e:
+        print(f"⚠️ Google Places search failed: {e}")
         return []
 
-    yelp_data = search_yelp(dish, latitude, longitude)
-    city_name = get_city_name(latitude, longitude)  # Get dynamic city name
+    # Only cache real answers; quota or key errors should be retried next time
+    if response.get("status") in ("OK", "ZERO_RESULTS"):
+        places_cache.set(cache_key, response.get("results", []))
+    return response.get("results", [])
 
-    restaurants = []
-    for r in response["results"][:5]:  # Limit to top 5 results
-        google_name = r["name"]
-        google_address = r.get("vicinity", "")
 
-        # Try to match Yelp data
-        best_match = None
-        best_score = 0
+def match_restaurants(places, yelp_data, city_name, limit=RESTAURANTS_PER_DISH):
+    """Attach the best-matching Yelp link to each of the first `limit` Google places (all if None)."""
+    places = places[:limit]
+    from matching import match_yelp  # Pulls in numpy/scipy/rapidfuzz, so only on the Outside path
 
-        for yelp_name, yelp_info in yelp_data.items():
-            name_score = fuzz.ratio(google_name.lower(), yelp_name.lower())
-            address_score = fuzz.partial_ratio(google_address.lower(), yelp_info["address"].lower())
-            total_score = (name_score * 0.7) + (address_score * 0.3)  
+    with timed("fuzzy_match"):
+        matches = match_yelp(places, yelp_data)
 
-            if total_score > best_score and total_score > 75:
-                best_score = total_score
-                best_match = yelp_name
+    restaurants = []
+    for r, best_match in zip(places, matches):
+        google_name = r["name"]
+        google_address = r.get("vicinity", "")
 
         # Use the best-matched Yelp link if found, otherwise generate a Yelp search link
         if best_match:
@@ -272,13 +766,13 @@ def search_restaurants(dish, latitude, longitude, radius=5000):
             search_query = extract_english(google_name).replace(" ", "+")  # Keep only English characters
             yelp_url = f"https://www.yelp.com/search?find_desc={search_query}&find_loc={city_name}"
 
-
         restaurants.append({
             "name": google_name,
             "address": google_address,
             "rating": r.get("rating", "No rating"),
             "latitude": r["geometry"]["location"]["lat"],
             "longitude": r["geometry"]["location"]["lng"],
+            "place_id": r["place_id"],
             "google_maps_url": f"https://www.google.com/maps/place/?q=place_id:{r['place_id']}",
             "yelp_url": yelp_url
         })
@@ -286,6 +780,129 @@ def search_restaurants(dish, latitude, longitude, radius=5000):
     return restaurants
 
 
+def find_known_restaurants(dish, latitude, longitude, radius=5000):
+    """Best restaurants for a dish from the local index, or None if Places should be asked."""
+    with timed("restaurant_index"):
+        return get_restaurant_index().lookup(dish, latitude, longitude, radius, RESTAURANTS_PER_DISH)
+
+
+def index_restaurants(dish, latitude, longitude, radius, places, yelp_data, city_name):
+    """Match a fresh Places answer against Yelp, add it to the index and return the best ranked.
+
+    Every place is kept in the index, not just the ones returned, so later
+    searches nearby can be answered without calling Places. Degraded answers
+    (no Yelp data or no city name, so only Yelp search links) are ranked and
+    returned but not indexed, so the next search tries the providers again.
+    """
+    from restaurant_index import rank_restaurants
+
+    restaurants = match_restaurants(places, yelp_data, city_name, limit=None)
+    # An empty answer may be an outage; don't mark the area as known
+    if not restaurants or not yelp_data or city_name == UNKNOWN_CITY:
+        return rank_restaurants(restaurants, latitude, longitude, radius, RESTAURANTS_PER_DISH)
+
+    index = get_restaurant_index()
+    index.add(dish, latitude, longitude, restaurants)
+    with timed("restaurant_index"):
+        return index.query(dish, latitude, longitude, radius, RESTAURANTS_PER_DISH)
+
+
+def merge_restaurants(restaurant_lists, seen=None):
+    """Concatenate per-dish restaurant lists, keeping the first occurrence of each place_id.
+
+    Pass the same `seen` set across calls to de-duplicate incrementally.
+    """
+    seen = set() if seen is None else seen
+    merged = []
+    for restaurants in restaurant_lists:
+        for r in restaurants:
+            if r["place_id"] in seen:
+                continue
+            seen.add(r["place_id"])
+            merged.append(r)
+    return merged
+
+
+def restaurant_searcher(latitude, longitude, radius=5000, max_concurrency=MAX_CONCURRENT_LOOKUPS):
+    """Return a coroutine function searching one dish's restaurants around a point: `dish -> (dish, restaurants)`.
+
+    Dishes the local index already knows around this point are answered without
+    any provider call. The rest query Places and Yelp in parallel; the location is
+    the same for every dish, so the city name is looked up at most once and
+    shared by all searches made through the same searcher.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    city_task = None
+
+    def city_name():
+        nonlocal city_task
+        if city_task is None:
+            city_task = asyncio.ensure_future(run_limited(semaphore, get_city_name, latitude, longitude))
+        return city_task
+
+    async def search_dish(dish):
+        known = await run_blocking(find_known_restaurants, dish, latitude, longitude, radius)
+        if known is not None:
+            return dish, known
+
+        places, yelp_data, city = await asyncio.gather(
+            run_limited(semaphore, search_places, dish, latitude, longitude, radius),
+            run_limited(semaphore, search_yelp, dish, latitude, longitude),
+            city_name()
+        )
+        return dish, await run_blocking(index_restaurants, dish, latitude, longitude, radius,
+                                        places, yelp_data, city)
+
+    return search_dish
+
+
+async def plan_restaurant_search(dish_types, latitude, longitude, radius=5000,
+                                 max_concurrency=MAX_CONCURRENT_LOOKUPS):
+    """Find restaurants for every dish type with one geocode and all searches in parallel.
+
+    `dish_types` is an async iterator (e.g. `stream_dish_types`); each dish's search
+    starts as soon as it arrives. Results are merged in dish order and
+    de-duplicated by `place_id`.
+    """
+    order = []
+
+    async def dishes():
+        async for dish in dish_types:
+            order.append(dish)
+            yield dish
+
+    search_dish = restaurant_searcher(latitude, longitude, radius, max_concurrency)
+    results = dict([result async for result in run_as_available(dishes(), search_dish)])
+    return merge_restaurants(results[dish] for dish in order)
+
+
+async def stream_restaurants(dish_types, latitude, longitude, radius=5000,
+                             max_concurrency=MAX_CONCURRENT_LOOKUPS):
+    """Yield one `restaurants` event per dish type in the order the searches finish, plus a `dishes` event.
+
+    `dish_types` is an async iterator; each dish's search starts as soon as it
+    arrives. The `dishes` event lists every dish type once the iterator is done.
+    """
+    seen = set()
+    names = []
+    search_dish = restaurant_searcher(latitude, longitude, radius, max_concurrency)
+
+    async def dishes():
+        async for dish in dish_types:
+            names.append(dish)
+            yield dish
+        yield None  # End of the list
+
+    async def search(dish):
+        if dish is None:
+            return {"event": "dishes", "data": names}
+        dish, restaurants = await search_dish(dish)
+        return {"event": "restaurants", "dish": dish, "data": merge_restaurants([restaurants], seen)}
+
+    async for event in run_as_available(dishes(), search):
+        yield event
+
+
 
 
 
@@ -294,26 +911,281 @@ def search_restaurants(dish, latitude, longitude, radius=5000):
 #     recommendations = generate_recommendation(request.preferences, request.goal, request.allergies, request.available_ingredients)
 #     return {"recommendations": recommendations}
 
-# ✅ Handle API Requests
-@app.post("/recommend")
-def recommend_diet(request: DietRequest):
+def route_label(scope):
+    """Path template of the route that will handle `scope` ("/fridge/{user_id}"), or "unmatched".
+
+    Resolved before routing runs, so the in-flight gauge and the latency
+    histogram share one label per route.
+    """
+    partial = None
+    for route in app.router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", "unmatched")
+        if match == Match.PARTIAL and partial is None:
+            partial = route  # Wrong method: routing answers 405 from here
+    return getattr(partial, "path", "unmatched")
+
+
+@app.middleware("http")
+async def track_requests(request: Request, call_next):
+    """Count in-flight requests and time each one, labelled by route rather than raw path."""
+    start = time.perf_counter()
+    route = route_label(request.scope)
+    requests_in_flight.inc(route=route)
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        requests_in_flight.dec(route=route)
+        request_latency.observe(time.perf_counter() - start, route=route, status=status)
+
+
+@register_collector
+def cache_metrics():
+    lines = [
+        "# HELP recommender_cache_hits_total Cache lookups served from cache.",
+        "# TYPE recommender_cache_hits_total counter",
+    ]
+    stats = cache_stats()
+    lines += [f'recommender_cache_hits_total{{cache="{name}"}} {s["hits"]}' for name, s in stats.items()]
+    lines += [
+        "# HELP recommender_cache_misses_total Cache lookups that went to the provider.",
+        "# TYPE recommender_cache_misses_total counter",
+    ]
+    lines += [f'recommender_cache_misses_total{{cache="{name}"}} {s["misses"]}' for name, s in stats.items()]
+    lines += [
+        "# HELP recommender_cache_hit_ratio Share of cache lookups that were hits.",
+        "# TYPE recommender_cache_hit_ratio gauge",
+    ]
+    lines += [f'recommender_cache_hit_ratio{{cache="{name}"}} {s["hit_ratio"]}' for name, s in stats.items()]
+    return lines
+
+
+@register_collector
+def restaurant_index_metrics():
+    if restaurant_index is None:
+        return []
+    stats = restaurant_index.stats()
+    return [
+        "# HELP recommender_restaurant_index_size Restaurants held in the local index.",
+        "# TYPE recommender_restaurant_index_size gauge",
+        f"recommender_restaurant_index_size {stats['restaurants']}",
+        "# HELP recommender_restaurant_index_local_hits_total Dish searches answered without Places.",
+        "# TYPE recommender_restaurant_index_local_hits_total counter",
+        f"recommender_restaurant_index_local_hits_total {stats['local_hits']}",
+        "# HELP recommender_restaurant_index_refreshes_total Places answers added to the index.",
+        "# TYPE recommender_restaurant_index_refreshes_total counter",
+        f"recommender_restaurant_index_refreshes_total {stats['refreshes']}",
+    ]
+
+
+@register_collector
+def admission_metrics():
+    stats = admission.stats()
+    lines = [
+        "# HELP recommender_admitted_requests Recommendation requests currently running.",
+        "# TYPE recommender_admitted_requests gauge",
+        f"recommender_admitted_requests {stats['active']}",
+        "# HELP recommender_queued_requests Recommendation requests waiting for a slot.",
+        "# TYPE recommender_queued_requests gauge",
+        f"recommender_queued_requests {stats['queued']}",
+        "# HELP recommender_rejected_requests_total Recommendation requests shed with 429.",
+        "# TYPE recommender_rejected_requests_total counter",
+        f"recommender_rejected_requests_total {stats['rejected']}",
+        "# HELP recommender_deadline_exceeded_total Provider calls dropped because the request ran out of budget.",
+        "# TYPE recommender_deadline_exceeded_total counter",
+    ]
+    lines += [f'recommender_deadline_exceeded_total{{provider="{name}"}} {count}'
+              for name, count in sorted(exceeded_counts().items())]
+    return lines
+
+
+@app.get("/metrics")
+def prometheus_metrics():
+    return PlainTextResponse(render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/cache/stats")
+def provider_cache_stats():
+    return cache_stats()
+
+
+@app.get("/providers/status")
+def provider_status():
+    """Circuit breaker state (closed / open / half_open) for each outbound provider."""
+    return breaker_states()
+
+
+# ✅ On-demand profiling, only with PROFILING_TOKEN set: send it as `X-Profile-Token` with a /recommend
+# call, or arm the next few calls here (these routes need the same header)
+def profiling_denied(request: Request):
+    """Error response unless profiling is enabled and the request carries its token, else None."""
+    if not profiling.enabled():
+        return FastJSONResponse({"error": "Not found."}, status_code=404)
+    if not profiling.authorized(request.headers.get(profiling.TOKEN_HEADER)):
+        return FastJSONResponse({"error": "Missing or wrong profiling token."}, status_code=403)
+    return None
+
+
+@app.get("/admin/profiling")
+def profiling_status(request: Request):
+    denied = profiling_denied(request)
+    if denied is not None:
+        return denied
+    return {"armed": profiling.armed()}
+
+
+@app.post("/admin/profiling")
+def arm_profiling(request: Request, requests: int = 1):
+    """Profile the next `requests` /recommend calls; 0 disarms."""
+    denied = profiling_denied(request)
+    if denied is not None:
+        return denied
+    profiling.arm(requests)
+    return {"armed": profiling.armed()}
+
+
+@app.get("/admin/profiles/{profile_id}")
+def get_profile(request: Request, profile_id: str):
+    """Stage timings of a stored profile; the profiler output itself is under /admin/profiles/{id}/profile."""
+    denied = profiling_denied(request)
+    if denied is not None:
+        return denied
+    record = profiling.load(profile_id)
+    if record is None:
+        return FastJSONResponse({"error": "Unknown profile id."}, status_code=404)
+    return record
+
+
+@app.get("/admin/profiles/{profile_id}/profile")
+def download_profile(request: Request, profile_id: str):
+    denied = profiling_denied(request)
+    if denied is not None:
+        return denied
+    record = profiling.load(profile_id)
+    if record is None or record["profile_file"] is None:
+        return FastJSONResponse({"error": "Unknown profile id."}, status_code=404)
+    return FileResponse(os.path.join(profiling.PROFILE_DIR, record["profile_file"]))
+
+
+async def recommend(request: DietRequest):
+    """The /recommend result for one request, as a plain dict (also used by batch runs)."""
+    canonical = canonical_request(request)
+
     if request.eat_location == "Outside":
         if request.latitude is None or request.longitude is None:
             return {"error": "Latitude and longitude are required for restaurant recommendations."}
 
-        # Step 1: Get dish recommendations based on user preferences
-        dish_types = recommend_dishes(request.preferences, request.goal, request.allergies)
-
-        # Step 2: Search for nearby restaurants serving these dish types
-        restaurants = []
-        for dish in dish_types:
-            restaurants.extend(search_restaurants(dish, request.latitude, request.longitude))
+        with timed("outside_pipeline"):
+            # Dish types stream in from GPT-4; each one's restaurant search starts as soon as it is parsed
+            dish_types = stream_dish_types(canonical["preferences"], request.goal, canonical["allergies"],
+                                           request.fresh)
+            restaurants = await plan_restaurant_search(dish_types, request.latitude, request.longitude)
 
         return {"restaurants": restaurants}
 
     elif request.eat_location == "Home":
-        recommendations = generate_recommendation(request.preferences, request.goal, request.allergies, request.available_ingredients)
+        with timed("home_pipeline"):
+            recommendations = await generate_recommendation_async(canonical["preferences"], request.goal, canonical["allergies"],
+                                                                  canonical["available_ingredients"], request.fresh)
         return {"recommendations": recommendations}
     else:
         return {"error": "Invalid choice. Use 'dine-in' or 'dine-out'."}
 
+
+# ✅ Handle API Requests
+@app.post("/recommend")
+async def recommend_diet(request: DietRequest, http_request: Request, compact: bool = False):
+    """`compact=true` returns the restaurant list in the columnar schema of `compact_restaurants`.
+
+    Responses carry an ETag of the canonical request and the result, so a client
+    sending it back in If-None-Match gets a 304 when nothing changed.
+    """
+    result = await recommend(request)
+    if compact and "restaurants" in result:
+        result = {"restaurants": compact_restaurants(result["restaurants"])}
+    key = request_key(**canonical_request(request), compact=compact)
+    return conditional_response(http_request, key, result)
+
+
+async def recommendation_events(request: DietRequest):
+    """Events for /recommend/stream, mirroring the branches of `recommend`."""
+    canonical = canonical_request(request)
+
+    if request.eat_location == "Outside":
+        if request.latitude is None or request.longitude is None:
+            yield {"event": "error", "data": {"message": "Latitude and longitude are required for restaurant recommendations."}}
+            return
+
+        dish_types = stream_dish_types(canonical["preferences"], request.goal, canonical["allergies"],
+                                       request.fresh)
+        try:
+            async for event in stream_restaurants(dish_types, request.latitude, request.longitude):
+                yield event
+        except Exception as e:
+            print(f"Restaurant search failed: {e}")
+            yield {"event": "error", "data": {"message": "Failed to fetch restaurant data."}}
+
+    elif request.eat_location == "Home":
+        async for event in stream_recommendation(canonical["preferences"], request.goal, canonical["allergies"],
+                                                 canonical["available_ingredients"], request.fresh):
+            yield event
+    else:
+        yield {"event": "error", "data": {"message": "Invalid choice. Use 'dine-in' or 'dine-out'."}}
+
+
+# ✅ Stream results as newline-delimited JSON, one event per meal / restaurant batch
+@app.post("/recommend/stream")
+async def recommend_diet_stream(request: DietRequest, compact: bool = False):
+    async def ndjson():
+        async for event in recommendation_events(request):
+            if compact and event["event"] == "restaurants":
+                event = dict(event, data=compact_restaurants(event["data"]))
+            yield dumps(event) + b"\n"
+        yield dumps({"event": "done"}) + b"\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
+
+# ✅ Bulk mode: JSONL body in, one JSONL result line out per record as it finishes
+@app.post("/recommend/batch")
+async def recommend_diet_batch(request: Request, concurrency: int = MAX_BATCH_CONCURRENCY):
+    body = (await request.body()).decode("utf-8")
+
+    async def process(record):
+        return await recommend(DietRequest(**record))
+
+    async def ndjson():
+        records = read_records(body.splitlines())
+        async for result in run_batch(records, process, min(max(concurrency, 1), MAX_BATCH_CONCURRENCY),
+                                      is_complete_response):
+            yield dumps(result) + b"\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
+# ✅ Per-user fridge
+@app.get("/fridge/{user_id}")
+def get_fridge(user_id: str):
+    return {"items": fridge_store.items(user_id)}
+
+
+@app.post("/fridge/{user_id}/items")
+def add_fridge_items(user_id: str, update: FridgeUpdate):
+    return {"items": fridge_store.add(user_id, update.items)}
+
+
+@app.delete("/fridge/{user_id}/items/{item}")
+def remove_fridge_item(user_id: str, item: str, quantity: int = Query(1, ge=1)):
+    removed = fridge_store.remove(user_id, item, quantity)
+    return {"removed": removed, "items": fridge_store.items(user_id)}
+
+
+@app.delete("/fridge/{user_id}")
+def clear_fridge(user_id: str):
+    fridge_store.clear(user_id)
+    return {"items": {}}
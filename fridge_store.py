@@ -0,0 +1,118 @@
+"""Per-user fridge contents with quantities, stored in SQLite.
+
+Each add or remove touches a single row, so concurrent Streamlit sessions (and
+several backend workers sharing the file) never overwrite each other's
+changes the way rewriting the whole of fridge.json did.
+"""
+import json
+import os
+import sqlite3
+import threading
+from collections import Counter
+
+FRIDGE_DB_PATH = os.environ.get("FRIDGE_DB", "fridge.db")
+LEGACY_FRIDGE_FILE = "fridge.json"
+DEFAULT_USER = "default"
+
+
+def normalize_item(item):
+    return " ".join(item.strip().lower().split())
+
+
+class FridgeStore:
+    """SQLite table of `(user_id, item) -> quantity`."""
+
+    def __init__(self, path=FRIDGE_DB_PATH):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS fridge ("
+                " user_id TEXT NOT NULL,"
+                " item TEXT NOT NULL,"
+                " quantity INTEGER NOT NULL CHECK (quantity > 0),"
+                " PRIMARY KEY (user_id, item))"
+            )
+            self._conn.execute("CREATE TABLE IF NOT EXISTS imports (path TEXT PRIMARY KEY)")
+
+    def items(self, user_id):
+        """Return `{item: quantity}` for a user, in alphabetical order."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT item, quantity FROM fridge WHERE user_id = ? ORDER BY item", (user_id,)
+            ).fetchall()
+        return dict(rows)
+
+    def add(self, user_id, items):
+        """Add one of each item (repeats add more); returns the updated contents."""
+        with self._lock, self._conn:
+            self._insert(user_id, items)
+        return self.items(user_id)
+
+    def _insert(self, user_id, items):
+        """Add the items inside the caller's transaction."""
+        counts = Counter(normalize_item(item) for item in items)
+        counts.pop("", None)
+        self._conn.executemany(
+            "INSERT INTO fridge (user_id, item, quantity) VALUES (?, ?, ?)"
+            " ON CONFLICT (user_id, item) DO UPDATE SET quantity = quantity + excluded.quantity",
+            [(user_id, item, quantity) for item, quantity in counts.items()]
+        )
+
+    def remove(self, user_id, item, quantity=1):
+        """Take `quantity` of an item out (all of it if None). Returns False if it was not there."""
+        if quantity is not None and quantity < 1:
+            raise ValueError(f"quantity must be at least 1, got {quantity}")
+        item = normalize_item(item)
+        with self._lock, self._conn:
+            if quantity is None:
+                cursor = self._conn.execute(
+                    "DELETE FROM fridge WHERE user_id = ? AND item = ?", (user_id, item)
+                )
+                return cursor.rowcount > 0
+
+            # Two single-statement writes, so concurrent writers can never leave a negative count
+            cursor = self._conn.execute(
+                "DELETE FROM fridge WHERE user_id = ? AND item = ? AND quantity <= ?", (user_id, item, quantity)
+            )
+            if cursor.rowcount > 0:
+                return True
+            cursor = self._conn.execute(
+                "UPDATE fridge SET quantity = quantity - ? WHERE user_id = ? AND item = ?",
+                (quantity, user_id, item)
+            )
+            return cursor.rowcount > 0
+
+    def clear(self, user_id):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM fridge WHERE user_id = ?", (user_id,))
+
+    def import_legacy_file(self, path=LEGACY_FRIDGE_FILE, user_id=DEFAULT_USER):
+        """Load the old shared fridge.json list into `user_id`'s fridge, once per file.
+
+        The file is only marked as imported together with its items, so an
+        unreadable file is left for a later attempt instead of being skipped.
+        """
+        if not os.path.exists(path):
+            return False
+        try:
+            with open(path, "r") as f:
+                items = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not import {path}: {e}")
+            return False
+        if not isinstance(items, list) or not all(isinstance(item, str) for item in items):
+            print(f"⚠️ Could not import {path}: expected a list of item names")
+            return False
+
+        with self._lock, self._conn:
+            cursor = self._conn.execute("INSERT OR IGNORE INTO imports (path) VALUES (?)", (os.path.abspath(path),))
+            if cursor.rowcount == 0:
+                return False
+            self._insert(user_id, items)
+        return True
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
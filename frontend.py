@@ -1,12 +1,12 @@
 import streamlit as st
 import requests
-import geocoder
 import json
-import os
-import matplotlib.pyplot as plt
-import folium
-from streamlit_folium import folium_static
+import hashlib
+from urllib.parse import quote
+from requests.adapters import HTTPAdapter
 
+# matplotlib, folium, streamlit_folium and geocoder are slow to import, so each one is
+# imported inside the function that uses it and only loads once that branch is shown
 
 API_URL = "API_URL"
 test = 'small test'
@@ -18,20 +18,176 @@ st.set_page_config(
     layout="wide"
 )
 
-# Load fridge data
-FRIDGE_FILE = "fridge.json"
+LOCATION_TTL = 600  # Seconds an IP-based location lookup is reused
+FRIDGE_TTL = 30  # Seconds a fetched fridge is reused; edits made here clear it right away
 
-def load_fridge():
-    if os.path.exists(FRIDGE_FILE):
-        with open(FRIDGE_FILE, "r") as f:
-            return json.load(f)
-    return []
 
-def save_fridge(fridge_items):
-    with open(FRIDGE_FILE, "w") as f:
-        json.dump(fridge_items, f)
+# Streamlit re-runs this whole script on every interaction, so anything that
+# touches the network is cached across reruns (and sessions, where safe).
+@st.cache_resource
+def get_http_session():
+    """Keep-alive connection pool to the backend, shared by every rerun and session."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+@st.cache_data(ttl=LOCATION_TTL, show_spinner=False)
+def detect_location():
+    """Approximate (latitude, longitude) from the public IP, or None."""
+    import geocoder
+
+    g = geocoder.ip('me')
+    return tuple(g.latlng) if g.latlng else None
+
+
+# Fridge data lives in the backend, one fridge per user
+@st.cache_data(ttl=FRIDGE_TTL, show_spinner=False)
+def fetch_fridge(user_id):
+    """Return `{item: quantity}` for the user's fridge."""
+    response = get_http_session().get(f"{API_URL}/fridge/{quote(user_id, safe='')}")
+    response.raise_for_status()
+    return response.json()["items"]
+
+def add_to_fridge(user_id, items):
+    response = get_http_session().post(f"{API_URL}/fridge/{quote(user_id, safe='')}/items", json={"items": items})
+    response.raise_for_status()
+    fetch_fridge.clear()
+    return response.json()["items"]
+
+def remove_from_fridge(user_id, item):
+    """Take one of `item` out; returns (removed, updated fridge)."""
+    response = get_http_session().delete(f"{API_URL}/fridge/{quote(user_id, safe='')}/items/{quote(item, safe='')}")
+    response.raise_for_status()
+    fetch_fridge.clear()
+    body = response.json()
+    return body["removed"], body["items"]
+
+def clear_fridge(user_id):
+    response = get_http_session().delete(f"{API_URL}/fridge/{quote(user_id, safe='')}")
+    response.raise_for_status()
+    fetch_fridge.clear()
+    return {}
+
+
+def expand_restaurants(compact):
+    """Restaurant dicts from the backend's compact (columnar) restaurant list."""
+    restaurants = []
+    for row in compact["rows"]:
+        r = dict(zip(compact["fields"], row))
+        yelp = r.pop("yelp")
+        r["yelp_url"] = yelp if yelp.startswith("http") else f"https://www.yelp.com/biz/{yelp}"
+        r["google_maps_url"] = f"https://www.google.com/maps/place/?q=place_id:{r['place_id']}"
+        restaurants.append(r)
+    return restaurants
+
+
+def stream_events(payload):
+    """POST to /recommend/stream and yield each NDJSON event as soon as it arrives."""
+    with get_http_session().post(f"{API_URL}/recommend/stream", params={"compact": "true"}, json=payload,
+                                 stream=True) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if line:
+                event = json.loads(line)
+                if event["event"] == "restaurants":
+                    event["data"] = expand_restaurants(event["data"])
+                yield event
+
+
+def remembered_events(mode, payload):
+    """Events from this session's last request in `mode`, if it was for the same payload."""
+    memo = st.session_state.get(f"last_results_{mode}")
+    key = hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+    return memo["events"] if memo and memo["key"] == key else None
+
+
+def stream_and_remember(mode, payload):
+    """Stream events from the backend and keep them for later reruns once the stream completes."""
+    key = hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+    events = []
+    for event in stream_events(payload):
+        events.append(event)
+        yield event
+    st.session_state[f"last_results_{mode}"] = {"key": key, "events": events}
+
+
+def recommendation_events(mode, payload, requested):
+    """Events to render this rerun, or None.
+
+    A click re-POSTs only when the payload changed or a fresh suggestion was
+    asked for; any other rerun replays the last results for the same payload.
+    """
+    remembered = remembered_events(mode, payload)
+    if requested and (remembered is None or payload["fresh"]):
+        return stream_and_remember(mode, payload)
+    return iter(remembered) if remembered is not None else None
+
+
+def render_meal(details):
+    """Dish name, recipe video and nutrient chart for one meal."""
+    st.markdown(f"**{details['dish']}**")
+    if details.get("youtube_link"):
+        st.video(details["youtube_link"])
+
+    if details.get("nutrients"):
+        nutrients = dict(details["nutrients"])  # Copy: remembered results are rendered again on rerun
+        calories = nutrients.pop("calories", None)
+        if calories:
+            st.markdown(f"**🔥 Calories: {calories} kcal**")
+        labels = list(nutrients.keys())
+        values = list(nutrients.values())
+        import matplotlib.pyplot as plt
+
+        fig, ax = plt.subplots(figsize=(2, 2))
+        ax.pie(values, labels=labels, autopct="%1.1f%%", startangle=90, textprops={'fontsize': 8})
+        ax.axis("equal")
+        st.pyplot(fig)
+        st.info(
+            f"{details['dish']} contains approximately {calories} kcal, "
+            f"{nutrients['protein']}g of protein, {nutrients['carbohydrates']}g of carbs, "
+            f"and {nutrients['fat']}g of fat per 500g serving."
+        )
+
+
+def build_restaurant_map(latitude, longitude, restaurants):
+    """Folium map centered on the user with one marker per restaurant."""
+    import folium
+
+    m = folium.Map(location=[latitude, longitude], zoom_start=14, tiles="cartodb positron")
+
+    # Add a marker for the user's location
+    folium.Marker(
+        location=[latitude, longitude],
+        popup="You are here 📍",
+        tooltip="Your Location",
+        icon=folium.Icon(color="blue", icon="home", prefix="fa")
+    ).add_to(m)
+
+    # Add restaurant markers
+    for r in restaurants:
+        popup_content = f"""
+        <b>{r['name']}</b><br>
+        ⭐ Rating: {r['rating']}<br>
+        📍 {r['address']}<br>
+        <a href="{r['google_maps_url']}" target="_blank">View on Google Maps</a>
+        """
+        if "yelp.com/search" in r["yelp_url"]:
+            popup_content += f'<a href="{r["yelp_url"]}" target="_blank">Search on Yelp</a>'
+        else:
+            popup_content += f'<a href="{r["yelp_url"]}" target="_blank">View on Yelp</a>'
+
+        folium.Marker(
+            location=[r["latitude"], r["longitude"]],
+            popup=folium.Popup(popup_content, max_width=300),
+            tooltip=r["name"],
+            icon=folium.Icon(color="red", icon="cutlery", prefix="fa")  # Custom icon color
+        ).add_to(m)
+
+    return m
 
-fridge = load_fridge()
 
 # Inject custom CSS for title styling
 st.markdown("""
@@ -77,88 +233,106 @@ goal = st.selectbox("Your Health Goal", ["Muscle Gain", "Weight Loss", "Maintain
 allergies = st.text_input("Enter allergens (comma-separated)", placeholder="e.g., nuts, gluten")
 
 eat_location = st.radio("Where would you like to eat?", ["Home", "Outside"], index=0)
+fresh = st.checkbox("🔄 Give me a fresh suggestion", value=False, help="Skip previously generated suggestions for the same preferences")
 
 if eat_location == "Home":
     # Fridge Feature
     st.subheader("🧊 Your Fridge")
+    user_id = st.text_input("👤 Whose fridge?", value="default", help="Each name has its own fridge").strip() or "default"
+    try:
+        fridge = fetch_fridge(user_id)
+    except requests.RequestException:
+        st.error("🚨 Could not load your fridge. Is the backend running?")
+        fridge = {}
+
     food_item = st.text_input("Enter a food item to add to / remove from your fridge", placeholder="e.g., chicken, spinach, eggs")
     if st.button("➕ Add Food to Fridge"):
         if food_item:
-            new_items = [item.strip().lower() for item in food_item.split(",")]
-            fridge.extend(new_items)
-            save_fridge(fridge)
-            st.success(f"✅ Added: {', '.join(new_items)} to the fridge!")
+            new_items = [item.strip().lower() for item in food_item.split(",") if item.strip()]
+            try:
+                fridge = add_to_fridge(user_id, new_items)
+                st.success(f"✅ Added: {', '.join(new_items)} to the fridge!")
+            except requests.RequestException:
+                st.error("🚨 Could not update your fridge. Please try again.")
     
     if st.button("➖ Remove Food from Fridge"):
         if food_item:
-            fridge.remove(food_item.lower())
-            save_fridge(fridge)
-            st.success(f"✅ {food_item} removed from the fridge!")
+            removed = []
+            for item in [item.strip().lower() for item in food_item.split(",") if item.strip()]:
+                try:
+                    was_there, fridge = remove_from_fridge(user_id, item)
+                except requests.RequestException:
+                    st.error("🚨 Could not update your fridge. Please try again.")
+                    break
+                if was_there:
+                    removed.append(item)
+                else:
+                    st.warning(f"⚠️ {item} is not in the fridge.")
+            if removed:
+                st.success(f"✅ {', '.join(removed)} removed from the fridge!")
     
     if fridge:
         st.write("### 🛒 Current Ingredients in Your Fridge:")
-        st.write(", ".join(fridge))
+        st.write(", ".join(f"{item} ×{quantity}" if quantity > 1 else item for item, quantity in fridge.items()))
     
     if st.button("🗑 Clear Fridge"):
-        fridge = []
-        save_fridge(fridge)
-        st.success("❌ Fridge cleared!")
+        try:
+            fridge = clear_fridge(user_id)
+            st.success("❌ Fridge cleared!")
+        except requests.RequestException:
+            st.error("🚨 Could not update your fridge. Please try again.")
 
     st.markdown("---")
     
     # Handle Meal Recommendation
-    if st.button("🔍 Generate Meal from Fridge"):
-        payload = {
-            "preferences": [p.strip() for p in preferences.split(",") if p.strip()],
-            "goal": goal,
-            "allergies": [a.strip() for a in allergies.split(",") if a.strip()],
-            "available_ingredients": fridge,
-            "eat_location": "Home"
-        }
-        response = requests.post(f"{API_URL}/recommend", json=payload)
-        
-        if response.status_code == 200:
-            recommendations = response.json()["recommendations"]
-            meals = {
-                "Breakfast": recommendations.get("breakfast", {"dish": "No recommendation available", "youtube_link": ""}),
-                "Lunch": recommendations.get("lunch", {"dish": "No recommendation available", "youtube_link": ""}),
-                "Dinner": recommendations.get("dinner", {"dish": "No recommendation available", "youtube_link": ""})
-            }
-            advice = recommendations.get("advice", {}).get("text", "No additional advice available.")
-            
-            st.subheader("🍽 Recommended Meals")
-            for meal, details in meals.items():
-                with st.expander(f"🔹 {meal} Recommendation"):
-                    st.markdown(f"**{details['dish']}**")
-                    if details["youtube_link"]:
-                        st.video(details["youtube_link"])
-                    
-                    if details.get("nutrients"):
-                        nutrients = details["nutrients"]
-                        calories = nutrients.pop("calories", None)
-                        if calories:
-                            st.markdown(f"**🔥 Calories: {calories} kcal**")
-                        labels = list(nutrients.keys())
-                        values = list(nutrients.values())
-                        fig, ax = plt.subplots(figsize=(2, 2))
-                        ax.pie(values, labels=labels, autopct="%1.1f%%", startangle=90, textprops={'fontsize': 8})
-                        ax.axis("equal")
-                        st.pyplot(fig)
-                        st.info(
-                            f"{details['dish']} contains approximately {calories} kcal, "
-                            f"{nutrients['protein']}g of protein, {nutrients['carbohydrates']}g of carbs, "
-                            f"and {nutrients['fat']}g of fat per 500g serving."
-                        )
-            st.subheader("⚠️ Nutritional Advice")
-            st.markdown(advice)
-        else:
+    requested = st.button("🔍 Generate Meal from Fridge")
+    payload = {
+        "preferences": [p.strip() for p in preferences.split(",") if p.strip()],
+        "goal": goal,
+        "allergies": [a.strip() for a in allergies.split(",") if a.strip()],
+        "available_ingredients": list(fridge),
+        "eat_location": "Home",
+        "fresh": fresh
+    }
+    events = recommendation_events("Home", payload, requested)
+
+    if events is not None:
+        # Lay out the expanders first, then fill each one as its event arrives
+        st.subheader("🍽 Recommended Meals")
+        meal_slots = {}
+        for meal in ["Breakfast", "Lunch", "Dinner"]:
+            with st.expander(f"🔹 {meal} Recommendation", expanded=True):
+                meal_slots[meal.lower()] = st.empty()
+                meal_slots[meal.lower()].markdown("⏳ Preparing your recommendation...")
+        st.subheader("⚠️ Nutritional Advice")
+        advice_slot = st.empty()
+        advice_slot.markdown("⏳ Preparing advice...")
+
+        received = set()
+        try:
+            for event in events:
+                if event["event"] in meal_slots:
+                    with meal_slots[event["event"]].container():
+                        render_meal(event["data"])
+                    received.add(event["event"])
+                elif event["event"] == "advice":
+                    advice_slot.markdown(event["data"]["text"])
+                    received.add("advice")
+                elif event["event"] == "error":
+                    st.error(f"🚨 {event['data']['message']}")
+        except requests.RequestException:
             st.error("🚨 Failed to retrieve recommendations. Please try again.")
 
+        for meal, slot in meal_slots.items():
+            if meal not in received:
+                slot.markdown("**No recommendation available**")
+        if "advice" not in received:
+            advice_slot.markdown("No additional advice available.")
+
 elif eat_location == "Outside":
     st.subheader("🍽️ Find Restaurants Nearby")
 
-    g = geocoder.ip('me')
-    location = g.latlng if g.latlng else None
+    location = detect_location()
 
     if location:
         latitude, longitude = location
@@ -168,63 +342,47 @@ elif eat_location == "Outside":
         longitude = st.number_input("Enter your longitude:", value=-73.935242)
         st.warning("Could not determine location automatically. Please enter manually.")
 
-    if st.button("📍 Find Restaurants"):
-        payload = {
-            "latitude": latitude,
-            "longitude": longitude,
-            "preferences": preferences.split(",") if preferences else [],
-            "goal": goal,
-            "allergies": allergies.split(",") if allergies else [],
-            "eat_location": "Outside"
-        }
-        response = requests.post(f"{API_URL}/recommend", json=payload)
-
-        if response.status_code == 200:
-            restaurants = response.json()["restaurants"]
-            st.subheader("🏨 Nearby Restaurants")
-
-            if not restaurants:
-                st.write("No restaurants found. Try adjusting search criteria.")
-            else:
-                # Create a map centered around user's location
-                m = folium.Map(location=[latitude, longitude], zoom_start=14, tiles="cartodb positron")
-
-                # Add a marker for the user's location
-                folium.Marker(
-                    location=[latitude, longitude],
-                    popup="You are here 📍",
-                    tooltip="Your Location",
-                    icon=folium.Icon(color="blue", icon="home", prefix="fa")
-                ).add_to(m)
-
-                # Add restaurant markers
-                for r in restaurants:
-                    popup_content = f"""
-                    <b>{r['name']}</b><br>
-                    ⭐ Rating: {r['rating']}<br>
-                    📍 {r['address']}<br>
-                    <a href="{r['google_maps_url']}" target="_blank">View on Google Maps</a>
-                    """
-                    if "yelp.com/search" in r["yelp_url"]:
-                        popup_content += f'<a href="{r["yelp_url"]}" target="_blank">Search on Yelp</a>'
-                    else:
-                        popup_content += f'<a href="{r["yelp_url"]}" target="_blank">View on Yelp</a>'
-                    
-                    folium.Marker(
-                        location=[r["latitude"], r["longitude"]],
-                        popup=folium.Popup(popup_content, max_width=300),
-                        tooltip=r["name"],
-                        icon=folium.Icon(color="red", icon="cutlery", prefix="fa")  # Custom icon color
-                    ).add_to(m)
-
-                    # st.markdown(f"**🍽 {r['name']}** - ⭐ {r['rating']}")
-                    # st.markdown(f"📍 {r['address']}")
-                    # st.markdown(f"[View on Google Maps]({r['google_maps_url']})")
-
-                st.subheader("📍 Map View")
-                folium_static(m)
-        else:
-            st.error("Failed to fetch restaurant data.")
+    requested = st.button("📍 Find Restaurants")
+    payload = {
+        "latitude": latitude,
+        "longitude": longitude,
+        "preferences": preferences.split(",") if preferences else [],
+        "goal": goal,
+        "allergies": allergies.split(",") if allergies else [],
+        "eat_location": "Outside",
+        "fresh": fresh
+    }
+    events = recommendation_events("Outside", payload, requested)
 
+    if events is not None:
+        st.subheader("🏨 Nearby Restaurants")
+        from streamlit_folium import folium_static
 
+        status_slot = st.empty()
+        status_slot.write("⏳ Searching for restaurants...")
+        map_slot = st.empty()
 
+        # Redraw the map each time another dish type's restaurants arrive
+        restaurants = []
+        failed = False
+        try:
+            for event in events:
+                if event["event"] == "restaurants" and event["data"]:
+                    restaurants.extend(event["data"])
+                    status_slot.write(f"📍 Showing {len(restaurants)} restaurants so far...")
+                    with map_slot.container():
+                        st.subheader("📍 Map View")
+                        folium_static(build_restaurant_map(latitude, longitude, restaurants))
+                elif event["event"] == "error":
+                    failed = True
+                    st.error(event["data"]["message"])
+        except requests.RequestException:
+            failed = True
+            st.error("Failed to fetch restaurant data.")
+
+        if restaurants:
+            status_slot.empty()
+        elif not failed:
+            status_slot.write("No restaurants found. Try adjusting search criteria.")
+        else:
+            status_slot.empty()
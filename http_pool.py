@@ -0,0 +1,264 @@
+"""Process-wide HTTP connection pool shared by every outbound provider call.
+
+One `httpx.Client` lives for the whole application: the FastAPI startup hook
+opens it and the shutdown hook closes it, and anything that runs outside the
+server (batch jobs, scripts) gets it lazily on first use. Each provider host is
+mounted on its own transport, so keep-alive connections are pooled per host
+and one slow provider cannot take every connection. Host names are resolved
+through a small TTL cache instead of on every new connection.
+
+HTTP_PROXY / HTTPS_PROXY / ALL_PROXY and NO_PROXY are honoured as by a plain
+httpx client: hosts that go through a proxy get a proxying transport (the
+proxy resolves their names, so the DNS cache is skipped for them).
+
+Set OUTBOUND_HTTP2=1 to negotiate HTTP/2 where the provider supports it
+(needs the optional `h2` package, `pip install httpx[http2]`).
+"""
+import os
+import socket
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import httpcore
+import httpx
+
+HTTP2_ENABLED = os.environ.get("OUTBOUND_HTTP2", "").lower() in ("1", "true", "yes")
+DEFAULT_MAX_CONNECTIONS = 20  # Per host, for hosts without their own limit
+KEEPALIVE_EXPIRY = 30  # Seconds an idle pooled connection is kept open
+DEFAULT_TIMEOUT = httpx.Timeout(10, connect=3)
+DNS_TTL = 300  # Seconds a resolved host name is reused
+
+_client = None
+_client_lock = threading.Lock()
+_host_limits = {}  # httpx mount pattern ("all://host[:port]") -> max connections
+_host_urls = {}  # httpx mount pattern -> a base URL on that host, for choosing its proxy
+
+
+class CachingResolver:
+    """getaddrinfo with a per-(host, port) TTL cache."""
+
+    def __init__(self, ttl=DNS_TTL):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, host, port):
+        """IP addresses for `host`, looked up at most once per `ttl` seconds."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get((host, port))
+        if entry is not None and entry[1] > now:
+            return entry[0]
+
+        infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        with self._lock:
+            self._entries[(host, port)] = (addresses, now + self.ttl)
+        return addresses
+
+    def forget(self, host, port):
+        with self._lock:
+            self._entries.pop((host, port), None)
+
+
+class CachingNetworkBackend(httpcore.SyncBackend):
+    """httpcore's default socket backend, connecting through a `CachingResolver`.
+
+    TLS still verifies against the original host name; only the address lookup is cached.
+    """
+
+    def __init__(self, resolver):
+        self.resolver = resolver
+
+    def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        try:
+            addresses = self.resolver.resolve(host, port)
+        except OSError as e:  # socket.gaierror; httpx reports failed lookups as ConnectError
+            raise httpcore.ConnectError(str(e)) from e
+        error = None
+        for address in addresses:
+            try:
+                return super().connect_tcp(address, port, timeout, local_address, socket_options)
+            except httpcore.ConnectError as e:
+                error = e
+        self.resolver.forget(host, port)  # Addresses may have moved; look them up again next time
+        raise error or httpcore.ConnectError(f"no addresses for {host}")
+
+
+resolver = CachingResolver()
+
+# httpcore errors and the httpx errors callers expect instead, most specific first
+HTTPCORE_ERRORS = (
+    (httpcore.ConnectTimeout, httpx.ConnectTimeout),
+    (httpcore.ReadTimeout, httpx.ReadTimeout),
+    (httpcore.WriteTimeout, httpx.WriteTimeout),
+    (httpcore.PoolTimeout, httpx.PoolTimeout),
+    (httpcore.ConnectError, httpx.ConnectError),
+    (httpcore.ReadError, httpx.ReadError),
+    (httpcore.WriteError, httpx.WriteError),
+    (httpcore.ProxyError, httpx.ProxyError),
+    (httpcore.UnsupportedProtocol, httpx.UnsupportedProtocol),
+    (httpcore.LocalProtocolError, httpx.LocalProtocolError),
+    (httpcore.RemoteProtocolError, httpx.RemoteProtocolError),
+    (httpcore.TimeoutException, httpx.TimeoutException),
+    (httpcore.NetworkError, httpx.NetworkError),
+    (httpcore.ProtocolError, httpx.ProtocolError),
+)
+
+
+@contextmanager
+def httpx_errors(request):
+    """Re-raise httpcore errors as their httpx counterparts."""
+    try:
+        yield
+    except Exception as e:
+        for core_error, httpx_error in HTTPCORE_ERRORS:
+            if isinstance(e, core_error):
+                raise httpx_error(str(e), request=request) from e
+        raise
+
+
+class _ResponseStream(httpx.SyncByteStream):
+    def __init__(self, stream, request):
+        self._stream = stream
+        self._request = request
+
+    def __iter__(self):
+        with httpx_errors(self._request):
+            for chunk in self._stream:
+                yield chunk
+
+    def close(self):
+        if hasattr(self._stream, "close"):
+            self._stream.close()
+
+
+class PoolTransport(httpx.BaseTransport):
+    """httpx transport over an `httpcore.ConnectionPool` we build ourselves, so it can use our network backend."""
+
+    def __init__(self, pool):
+        self._pool = pool
+
+    def handle_request(self, request):
+        core_request = httpcore.Request(
+            method=request.method,
+            url=httpcore.URL(scheme=request.url.raw_scheme, host=request.url.raw_host,
+                             port=request.url.port, target=request.url.raw_path),
+            headers=request.headers.raw,
+            content=request.stream,
+            extensions=request.extensions,
+        )
+        with httpx_errors(request):
+            response = self._pool.handle_request(core_request)
+        return httpx.Response(status_code=response.status, headers=response.headers,
+                              stream=_ResponseStream(response.stream, request), extensions=response.extensions)
+
+    def close(self):
+        self._pool.close()
+
+
+def host_pattern(url):
+    """httpx mount pattern matching every request to the host (and explicit port) of `url`."""
+    parts = urlsplit(url)
+    return f"all://{parts.hostname}:{parts.port}" if parts.port else f"all://{parts.hostname}"
+
+
+def configure(hosts):
+    """Register `{base_url: max_connections}`; URLs on the same host share one pool and add up their limits.
+
+    Takes effect the next time the client is created.
+    """
+    limits = {}
+    urls = {}
+    for url, max_connections in hosts.items():
+        key = host_pattern(url)
+        limits[key] = limits.get(key, 0) + max_connections
+        urls.setdefault(key, url)
+    with _client_lock:
+        _host_limits.clear()
+        _host_limits.update(limits)
+        _host_urls.clear()
+        _host_urls.update(urls)
+
+
+def env_proxies():
+    """`{scheme: proxy_url}` from HTTP_PROXY / HTTPS_PROXY / ALL_PROXY."""
+    proxies = urllib.request.getproxies()
+    return {scheme: proxies[scheme] if "://" in proxies[scheme] else f"http://{proxies[scheme]}"
+            for scheme in ("http", "https", "all") if proxies.get(scheme)}
+
+
+def proxy_for(url):
+    """The environment's proxy for requests to `url`, or None if there is none or NO_PROXY exempts the host."""
+    parts = urlsplit(url)
+    proxies = env_proxies()
+    proxy = proxies.get(parts.scheme) or proxies.get("all")
+    if proxy is None or urllib.request.proxy_bypass(parts.hostname):
+        return None
+    return proxy
+
+
+def _http2_available():
+    if not HTTP2_ENABLED:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        print("⚠️ OUTBOUND_HTTP2 is set but the h2 package is missing; using HTTP/1.1")
+        return False
+    return True
+
+
+def _limits(max_connections):
+    return httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections,
+                        keepalive_expiry=KEEPALIVE_EXPIRY)
+
+
+def _transport(max_connections, http2, proxy=None):
+    if proxy is not None:
+        return httpx.HTTPTransport(proxy=proxy, http2=http2, limits=_limits(max_connections))
+    return PoolTransport(httpcore.ConnectionPool(
+        ssl_context=httpx.create_ssl_context(),
+        max_connections=max_connections,
+        max_keepalive_connections=max_connections,
+        keepalive_expiry=KEEPALIVE_EXPIRY,
+        http1=True,
+        http2=http2,
+        network_backend=CachingNetworkBackend(resolver),
+    ))
+
+
+def build_client():
+    http2 = _http2_available()
+    mounts = {pattern: _transport(max_connections, http2, proxy_for(_host_urls[pattern]))
+              for pattern, max_connections in _host_limits.items()}
+    if env_proxies():
+        # Without our own default transport httpx mounts the environment's proxies for every other host
+        return httpx.Client(timeout=DEFAULT_TIMEOUT, http2=http2, limits=_limits(DEFAULT_MAX_CONNECTIONS),
+                            mounts=mounts)
+    return httpx.Client(
+        timeout=DEFAULT_TIMEOUT,
+        transport=_transport(DEFAULT_MAX_CONNECTIONS, http2),
+        mounts=mounts,
+    )
+
+
+def get_client():
+    """The shared client, created on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = build_client()
+        return _client
+
+
+def close():
+    """Close every pooled connection; the next `get_client()` starts a fresh pool."""
+    global _client
+    with _client_lock:
+        client, _client = _client, None
+    if client is not None:
+        client.close()
@@ -0,0 +1,100 @@
+"""Batch matching of Google Places results to Yelp businesses.
+
+Scores every Google/Yelp pair at once with rapidfuzz's `cdist`, skips pairs
+whose names share no normalized token, and solves a one-to-one assignment so two
+Google places can never claim the same Yelp entry.
+"""
+import re
+
+import numpy as np
+from rapidfuzz import fuzz, process
+from scipy.optimize import linear_sum_assignment
+
+NAME_WEIGHT = 0.7
+ADDRESS_WEIGHT = 0.3
+MATCH_THRESHOLD = 75  # Minimum combined score for a pair to count as the same business
+
+# Below this name score a pair cannot beat MATCH_THRESHOLD even with a perfect address
+MIN_NAME_SCORE = (MATCH_THRESHOLD - ADDRESS_WEIGHT * 100) / NAME_WEIGHT
+
+_STOP_TOKENS = {"the", "and", "restaurant", "cafe", "bar", "grill", "kitchen", "st", "ave", "rd"}
+
+
+def normalize_tokens(text):
+    """Lowercase word tokens with punctuation removed ("Joe's" -> "joes") and filler dropped."""
+    return set(re.sub(r"[^\w\s]", "", text.lower()).split()) - _STOP_TOKENS
+
+
+def _incidence(token_sets, vocabulary):
+    matrix = np.zeros((len(token_sets), len(vocabulary)), dtype=np.float32)
+    for row, tokens in enumerate(token_sets):
+        columns = [vocabulary[t] for t in tokens if t in vocabulary]
+        matrix[row, columns] = 1.0
+    return matrix
+
+
+def blocking_mask(google_texts, yelp_texts):
+    """Boolean matrix, True where a Google and a Yelp text share at least one token."""
+    google_tokens = [normalize_tokens(t) for t in google_texts]
+    yelp_tokens = [normalize_tokens(t) for t in yelp_texts]
+    vocabulary = {t: i for i, t in enumerate(set().union(*yelp_tokens))} if yelp_tokens else {}
+    if not vocabulary:
+        return np.zeros((len(google_texts), len(yelp_texts)), dtype=bool)
+    return (_incidence(google_tokens, vocabulary) @ _incidence(yelp_tokens, vocabulary).T) > 0
+
+
+def score_matrix(google_names, google_addresses, yelp_names, yelp_addresses):
+    """Combined name/address similarity for every Google x Yelp pair (0-100).
+
+    Names are scored for the full matrix; the costlier partial address ratio is
+    only computed for pairs whose names share a token and could still reach
+    MATCH_THRESHOLD on their name score alone. Blocking looks at names only:
+    both providers put the city in every address, so address tokens would let
+    every pair through.
+    """
+    name_scores = process.cdist(google_names, yelp_names, scorer=fuzz.ratio,
+                                processor=str.lower, dtype=np.float32)
+    candidates = blocking_mask(google_names, yelp_names) & (name_scores > MIN_NAME_SCORE)
+
+    scores = np.zeros_like(name_scores)
+    rows, cols = np.nonzero(candidates)
+    for row, col in zip(rows, cols):
+        address_score = fuzz.partial_ratio(google_addresses[row].lower(), yelp_addresses[col].lower())
+        scores[row, col] = NAME_WEIGHT * name_scores[row, col] + ADDRESS_WEIGHT * address_score
+    return scores
+
+
+def match_yelp(places, yelp_data, threshold=MATCH_THRESHOLD):
+    """Best one-to-one Yelp match for each Google place.
+
+    `places` are raw Google Places results and `yelp_data` is the
+    `{name: {"url", "address"}}` mapping from `search_yelp`. Returns a list
+    aligned with `places` holding the matched Yelp name, or None.
+    """
+    if not places or not yelp_data:
+        return [None] * len(places)
+
+    yelp_names = list(yelp_data)
+    scores = score_matrix(
+        [p["name"] for p in places],
+        [p.get("vicinity", "") for p in places],
+        yelp_names,
+        [yelp_data[name]["address"] for name in yelp_names],
+    )
+
+    return [None if col is None else yelp_names[col] for col in assign(scores, threshold)]
+
+
+def assign(scores, threshold=MATCH_THRESHOLD):
+    """One-to-one assignment over a score matrix: the matched column per row, or None.
+
+    Only pairs above `threshold` take part, so the solver can never trade one
+    valid match for two sub-threshold pairs with a higher total.
+    """
+    eligible = np.where(scores > threshold, scores, 0)
+    matches = [None] * scores.shape[0]
+    rows, cols = linear_sum_assignment(eligible, maximize=True)
+    for row, col in zip(rows, cols):
+        if eligible[row, col] > 0:
+            matches[row] = int(col)
+    return matches
@@ -0,0 +1,149 @@
+"""In-process latency metrics with Prometheus text exposition.
+
+Every external call and pipeline stage is timed with `timed(stage)`, which
+records into a histogram labelled by stage and outcome. `render()` produces
+the text served on /metrics, so p50/p95/p99 per stage can be derived with
+`histogram_quantile` on the Prometheus side.
+"""
+import threading
+import time
+from contextvars import ContextVar
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    return repr(float(value)) if value != float("inf") else "+Inf"
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a fixed tuple of label names."""
+
+    def __init__(self, name, documentation, labelnames, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def collect(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series["counts"]):
+                    labels = _format_labels(self.labelnames, key, [("le", _format_value(bound))])
+                    lines.append(f"{self.name}_bucket{labels} {count}")
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}_sum{labels} {series['sum']}")
+                lines.append(f"{self.name}_count{labels} {series['count']}")
+        return lines
+
+
+class Gauge:
+    """Value that goes up and down, e.g. requests currently in flight."""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def collect(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+stage_latency = Histogram(
+    "recommender_stage_duration_seconds",
+    "Latency of external calls and pipeline stages.",
+    ("stage", "outcome"),
+)
+request_latency = Histogram(
+    "recommender_http_request_duration_seconds",
+    "Time until response headers are sent, per route and status code.",
+    ("route", "status"),
+)
+requests_in_flight = Gauge(
+    "recommender_http_requests_in_flight",
+    "HTTP requests currently being handled, per route.",
+    ("route",),
+)
+
+_collectors = []
+
+# Set while a request is being profiled: called as (stage, outcome, start, wall, cpu) for every timed stage
+stage_recorder = ContextVar("stage_recorder", default=None)
+
+
+def register_collector(fn):
+    """Add a callable returning extra exposition lines, evaluated on every scrape."""
+    _collectors.append(fn)
+    return fn
+
+
+class timed:
+    """Context manager recording how long a stage took.
+
+    The outcome label is "ok", "error" if the block raised, or whatever the
+    block assigned to `.outcome` (e.g. "fallback").
+    """
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.outcome = "ok"
+
+    def __enter__(self):
+        self.recorder = stage_recorder.get()
+        if self.recorder is not None:
+            self.cpu_start = time.thread_time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        outcome = "error" if exc_type is not None else self.outcome
+        stage_latency.observe(elapsed, stage=self.stage, outcome=outcome)
+        if self.recorder is not None:
+            self.recorder(self.stage, outcome, self.start, elapsed, time.thread_time() - self.cpu_start)
+        return False
+
+
+def render():
+    """Prometheus text exposition (format 0.0.4) for every metric."""
+    lines = stage_latency.collect() + request_latency.collect() + requests_in_flight.collect()
+    for collector in _collectors:
+        lines.extend(collector())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,106 @@
+"""Local nutrition database keyed by canonical dish name.
+
+Nutrition facts for a dish do not change between requests, so every
+successful LLM answer is stored here and reused. Lookups first try the exact
+canonical name, then fall back to fuzzy matching so near-duplicates such as
+"Grilled chicken salad w/ avocado" reuse the "Grilled Chicken Salad" entry.
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+NUTRITION_DB_PATH = os.environ.get("NUTRITION_DB", "nutrition.db")
+FUZZY_MATCH_THRESHOLD = 90  # Minimum token_set_ratio for a near-duplicate hit
+MIN_TOKEN_OVERLAP = 0.6  # Shorter name must cover this share of the longer one's tokens
+
+NUTRIENT_KEYS = ("calories", "protein", "carbohydrates", "fat")
+
+_STOP_WORDS = {"a", "an", "and", "the", "of", "with", "w"}
+
+
+def canonical_dish_name(name):
+    """Normalize a dish name: drop list numbering, punctuation, filler words and case."""
+    name = name.lower().strip()
+    name = re.sub(r"^\s*\d+[.)]\s*", "", name)  # "1. Avocado Toast" -> "avocado toast"
+    name = name.replace("&", " and ").replace("w/", " with ")
+    tokens = re.sub(r"[^a-z0-9\s]", " ", name).split()
+    return " ".join(t for t in tokens if t not in _STOP_WORDS)
+
+
+def is_valid_nutrients(data):
+    """True if `data` has a numeric value for every nutrient the frontend renders."""
+    return isinstance(data, dict) and all(
+        isinstance(data.get(key), (int, float)) and not isinstance(data.get(key), bool)
+        for key in NUTRIENT_KEYS
+    )
+
+
+class NutritionStore:
+    """SQLite-backed nutrition table with an in-memory index for fuzzy lookups."""
+
+    def __init__(self, path=NUTRITION_DB_PATH):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS nutrition ("
+                " name TEXT PRIMARY KEY,"
+                " data TEXT NOT NULL,"
+                " created_at REAL NOT NULL)"
+            )
+            rows = self._conn.execute("SELECT name, data FROM nutrition").fetchall()
+        self._entries = {name: json.loads(data) for name, data in rows}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, dish_name):
+        """Return stored nutrients for `dish_name` or a near-duplicate of it, else None."""
+        key = canonical_dish_name(dish_name)
+        if not key:
+            return None
+
+        with self._lock:
+            if key in self._entries:
+                return dict(self._entries[key])
+            names = list(self._entries)
+
+        from thefuzz import fuzz, process  # Only needed when the exact lookup misses
+
+        match = process.extractOne(key, names, scorer=fuzz.token_set_ratio,
+                                   score_cutoff=FUZZY_MATCH_THRESHOLD) if names else None
+        if match is None:
+            return None
+
+        # token_set_ratio scores any subset as 100, so "chicken" would match "chicken curry";
+        # require the two names to share most of their tokens as well
+        candidate = match[0]
+        query_tokens, candidate_tokens = set(key.split()), set(candidate.split())
+        overlap = len(query_tokens & candidate_tokens) / max(len(query_tokens), len(candidate_tokens))
+        if overlap < MIN_TOKEN_OVERLAP:
+            return None
+
+        with self._lock:
+            return dict(self._entries[candidate])
+
+    def put(self, dish_name, nutrients):
+        """Store nutrients for a dish. Incomplete or malformed data is ignored."""
+        key = canonical_dish_name(dish_name)
+        if not key or not is_valid_nutrients(nutrients):
+            return False
+
+        data = {k: nutrients[k] for k in NUTRIENT_KEYS}
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO nutrition (name, data, created_at) VALUES (?, ?, ?)",
+                (key, json.dumps(data), time.time())
+            )
+            self._entries[key] = data
+        return True
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
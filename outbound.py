@@ -0,0 +1,291 @@
+"""Shared layer for outbound calls to OpenAI, Google, Yelp and YouTube.
+
+Every provider call goes through `call`, which applies, in order:
+
+1. single-flight coalescing: concurrent calls with the same key share one request;
+2. a circuit breaker: after repeated failures the provider is skipped for a while,
+   so callers drop straight to their fallbacks instead of waiting on timeouts,
+   and then a single probe call decides whether it is back;
+3. retries with jittered exponential backoff for transient errors (tenacity);
+4. a token-bucket rate limit per provider, applied to every attempt;
+5. the request's latency budget (see deadlines.py): no attempt starts once it is
+   spent, timeouts and backoff never run past it, and running out of budget
+   raises DeadlineExceeded without counting against the provider's breaker.
+"""
+import sys
+import threading
+import time
+
+import httpx
+from tenacity import Retrying, retry_if_exception, stop_after_attempt, wait_random_exponential
+
+import deadlines
+import http_pool
+from deadlines import DeadlineExceeded
+
+# Requests per second, burst size, (connect, read) timeout, pooled connections and breaker settings per provider
+PROVIDERS = {
+    "openai": {"rate": 5, "burst": 10, "timeout": (5, 30), "max_connections": 20,
+               "failure_threshold": 5, "reset_timeout": 30},
+    "google": {"rate": 20, "burst": 40, "timeout": (3, 5), "max_connections": 20,
+               "failure_threshold": 5, "reset_timeout": 30},
+    "yelp": {"rate": 5, "burst": 10, "timeout": (3, 5), "max_connections": 10,
+             "failure_threshold": 5, "reset_timeout": 30},
+    "youtube": {"rate": 10, "burst": 20, "timeout": (3, 5), "max_connections": 10,
+                "failure_threshold": 5, "reset_timeout": 30},
+}
+MAX_ATTEMPTS = 3
+BACKOFF_MULTIPLIER = 0.2  # Seconds; the random wait doubles up to BACKOFF_MAX
+BACKOFF_MAX = 2
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit breaker is open."""
+
+
+class RetryableStatusError(Exception):
+    """A provider answered with a throttling or server-error status code."""
+
+    def __init__(self, provider, status_code):
+        super().__init__(f"{provider} returned HTTP {status_code}")
+        self.status_code = status_code
+
+
+RETRYABLE_ERRORS = (
+    RetryableStatusError,
+    httpx.TransportError,  # Connect/read timeouts and dropped connections
+)
+
+
+def is_retryable(error):
+    """Transient failure worth another attempt: network trouble, throttling or a 5xx."""
+    if isinstance(error, RETRYABLE_ERRORS):
+        return True
+    # Checked via sys.modules so this layer never imports the (slow to load) OpenAI SDK itself;
+    # if it is not loaded yet, no OpenAI call can have failed.
+    openai = sys.modules.get("openai")
+    return openai is not None and isinstance(
+        error, (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)
+    )
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, holding at most `burst`."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout=None):
+        """Take one token, sleeping until one is available.
+
+        Returns False without taking a token if none can be had within
+        `timeout` seconds (None waits as long as it takes).
+        """
+        give_up = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if give_up is not None and now + wait > give_up:
+                return False
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures; lets one probe through after `reset_timeout` seconds.
+
+    While the probe is in flight every other call still fails fast; its
+    outcome closes the breaker or opens it for another `reset_timeout`.
+    """
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def _state(self):
+        if self._opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self._opened_at >= self.reset_timeout else "open"
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def allow(self):
+        """True if a call may go out; in half_open only for the first caller, which becomes the probe."""
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return True
+            if state == "open" or self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+    def release_probe(self):
+        """The call ended without telling us anything about the provider; let the next caller probe."""
+        with self._lock:
+            self._probing = False
+
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key into one execution."""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        """Run `fn`, or wait (within the request's budget) for the identical call already running.
+
+        A leader that ran out of its own budget says nothing about the
+        followers', so they try again (one of them as the new leader) rather
+        than sharing its DeadlineExceeded.
+        """
+        while True:
+            with self._lock:
+                flight = self._calls.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._calls[key] = {"done": threading.Event(), "result": None, "error": None}
+            if leader:
+                break
+
+            if not flight["done"].wait(deadlines.remaining()):
+                raise DeadlineExceeded("request budget spent waiting for a shared call")
+            if isinstance(flight["error"], DeadlineExceeded):
+                continue
+            if flight["error"] is not None:
+                raise flight["error"]
+            return flight["result"]
+
+        try:
+            flight["result"] = fn()
+            return flight["result"]
+        except Exception as e:
+            flight["error"] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            flight["done"].set()
+
+
+rate_limiters = {name: TokenBucket(cfg["rate"], cfg["burst"]) for name, cfg in PROVIDERS.items()}
+circuit_breakers = {
+    name: CircuitBreaker(cfg["failure_threshold"], cfg["reset_timeout"]) for name, cfg in PROVIDERS.items()
+}
+in_flight = SingleFlight()
+backoff = wait_random_exponential(multiplier=BACKOFF_MULTIPLIER, max=BACKOFF_MAX)
+
+
+def wait_within_budget(retry_state):
+    """Jittered backoff, but never sleeping past the request's deadline."""
+    left = deadlines.remaining()
+    wait = backoff(retry_state)
+    return wait if left is None else min(wait, max(left, 0))
+
+
+def call(provider, fn, *args, key=None, **kwargs):
+    """Call `fn(*args, **kwargs)` against `provider` with coalescing, breaker, retries and rate limiting.
+
+    Calls sharing a hashable `key` while one is already running wait for and
+    reuse its result. Raises CircuitOpenError without calling when the
+    provider's breaker is open, and DeadlineExceeded once the request's
+    budget is spent.
+    """
+    breaker = circuit_breakers[provider]
+    limiter = rate_limiters[provider]
+
+    def attempt():
+        deadlines.check(provider)
+        if not limiter.acquire(deadlines.remaining()):
+            deadlines.record_exceeded(provider)
+            raise DeadlineExceeded(f"request budget spent waiting for a {provider} rate-limit token")
+        deadlines.check(provider)
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            if deadlines.expired():  # Cut off by our own budget, not a provider fault
+                deadlines.record_exceeded(provider)
+                raise DeadlineExceeded(f"request budget spent waiting for {provider}") from e
+            raise
+
+    def guarded():
+        if not breaker.allow():
+            raise CircuitOpenError(f"{provider} circuit is open")
+        retrying = Retrying(
+            stop=stop_after_attempt(MAX_ATTEMPTS),
+            wait=wait_within_budget,
+            retry=retry_if_exception(is_retryable),
+            reraise=True,
+        )
+        try:
+            result = retrying(attempt)
+        except DeadlineExceeded:
+            breaker.release_probe()
+            raise
+        except Exception:
+            breaker.record_failure()
+            raise
+        breaker.record_success()
+        return result
+
+    if key is None:
+        return guarded()
+    return in_flight.do((provider, key), guarded)
+
+
+def provider_timeout(provider):
+    connect_timeout, read_timeout = PROVIDERS[provider]["timeout"]
+    return httpx.Timeout(read_timeout, connect=connect_timeout)
+
+
+def get_json(provider, url, params=None, headers=None):
+    """GET a provider endpoint over the shared connection pool and decode its JSON body.
+
+    Throttling and server errors are retried; other error responses are returned
+    as-is so callers can inspect the provider's own error payload.
+    """
+    def fetch():
+        response = http_pool.get_client().get(url, params=params, headers=headers,
+                                              timeout=deadlines.capped_timeout(provider_timeout(provider)))
+        if response.status_code in RETRYABLE_STATUS:
+            raise RetryableStatusError(provider, response.status_code)
+        return response.json()
+
+    key = (url, tuple(sorted((params or {}).items())))
+    return call(provider, fetch, key=key)
+
+
+def breaker_states():
+    return {name: breaker.state for name, breaker in circuit_breakers.items()}
@@ -0,0 +1,282 @@
+"""Opt-in profiling of individual /recommend calls.
+
+Profiling is off unless PROFILING_TOKEN is set. Then a request sent with
+`X-Profile-Token: <PROFILING_TOKEN>`, or any /recommend call while profiling is
+armed through /admin/profiling (which needs the same header), runs under a
+profiler: pyinstrument (sampling, follows the request's task across awaits;
+pinned in requirements.txt), or cProfile as a much costlier deterministic
+fallback when it is missing. Blocking lookups the request hands to worker
+threads are profiled in the thread that runs them and merged in. The profile is
+stored under PROFILE_DIR as <id>.html (pyinstrument) or <id>.pstats (cProfile),
+next to <id>.json with the request's stage timings; the id comes back in the
+X-Profile-Id response header.
+
+Stage timings come from `metrics.timed`: wall time and CPU time of the thread
+the stage ran on, so a stage spending most of its wall time off-CPU was waiting
+on the network. For stages that span awaits, CPU time includes whatever else
+the event loop ran meanwhile.
+
+With profiling off the only cost is a context-variable lookup per stage and
+per blocking call.
+"""
+import asyncio
+import json
+import os
+import re
+import secrets
+import threading
+import time
+from contextvars import ContextVar
+
+from starlette.datastructures import Headers
+
+from metrics import stage_recorder
+
+PROFILING_TOKEN = os.environ.get("PROFILING_TOKEN", "")  # Empty disables profiling and the admin routes
+TOKEN_HEADER = "X-Profile-Token"
+PROFILE_ID_HEADER = "X-Profile-Id"
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+MAX_STORED_PROFILES = 50  # Oldest profiles are deleted beyond this
+SAMPLE_INTERVAL = 0.001  # Seconds between pyinstrument samples
+
+PROFILE_ID_PATTERN = re.compile(r"^[0-9a-f]{16}$")
+
+_session = ContextVar("profile_session", default=None)
+_armed = 0  # /recommend calls still to profile without the token
+_armed_lock = threading.Lock()
+_loop_profiler_lock = threading.Lock()  # One profiler per thread: concurrent sessions skip the event loop
+
+
+def arm(requests):
+    """Profile the next `requests` /recommend calls (0 disarms)."""
+    global _armed
+    with _armed_lock:
+        _armed = max(requests, 0)
+
+
+def armed():
+    with _armed_lock:
+        return _armed
+
+
+def _take_armed():
+    global _armed
+    with _armed_lock:
+        if _armed <= 0:
+            return False
+        _armed -= 1
+        return True
+
+
+def enabled():
+    return bool(PROFILING_TOKEN)
+
+
+def authorized(token):
+    """True if profiling is enabled and `token` is its token."""
+    return enabled() and token is not None and secrets.compare_digest(token, PROFILING_TOKEN)
+
+
+def wanted(headers):
+    """True if this request carries the profiling token, or profiling is armed."""
+    if not enabled():
+        return False
+    return authorized(headers.get(TOKEN_HEADER)) or _take_armed()
+
+
+def current():
+    """The profile session of the request being handled, or None."""
+    return _session.get()
+
+
+def _pyinstrument():
+    try:
+        import pyinstrument
+    except ImportError:
+        return None
+    return pyinstrument
+
+
+class _Profiler:
+    """Start/stop wrapper over pyinstrument or cProfile for the calling thread."""
+
+    def __init__(self, async_mode):
+        pyinstrument = _pyinstrument()
+        if pyinstrument is not None:
+            self.kind = "pyinstrument"
+            self._profiler = pyinstrument.Profiler(interval=SAMPLE_INTERVAL,
+                                                   async_mode="enabled" if async_mode else "disabled")
+        else:
+            import cProfile
+
+            self.kind = "cprofile"
+            self._profiler = cProfile.Profile()
+        self.result = None
+
+    def start(self):
+        if self.kind == "pyinstrument":
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+
+    def stop(self):
+        if self.kind == "pyinstrument":
+            self.result = self._profiler.stop()
+        else:
+            self._profiler.disable()
+            self.result = self._profiler
+
+
+class ProfileSession:
+    """Profiler output and stage timings for one request."""
+
+    def __init__(self):
+        self.id = secrets.token_hex(8)
+        self.stages = []  # Appended from worker threads too; list.append is atomic
+        self._profiles = []
+        self._main = None
+        self._started = time.perf_counter()
+        self.duration = None
+
+    def record_stage(self, stage, outcome, started, wall, cpu):
+        self.stages.append({
+            "stage": stage,
+            "outcome": outcome,
+            "thread": threading.current_thread().name,
+            "start_ms": round((started - self._started) * 1000, 2),
+            "wall_ms": round(wall * 1000, 2),
+            "cpu_ms": round(cpu * 1000, 2),
+        })
+
+    def start(self):
+        """Profile the calling (event loop) thread, unless another session already does."""
+        if _loop_profiler_lock.acquire(blocking=False):
+            self._main = _Profiler(async_mode=True)
+            self._main.start()
+
+    def stop(self):
+        self.duration = time.perf_counter() - self._started
+        if self._main is not None:
+            self._main.stop()
+            self._profiles.insert(0, self._main)
+            _loop_profiler_lock.release()
+
+    def run(self, fn, *args):
+        """`fn(*args)` profiled in the calling worker thread."""
+        profiler = _Profiler(async_mode=False)
+        try:
+            profiler.start()
+        except (RuntimeError, ValueError) as e:  # Another profiler already owns this thread
+            print(f"⚠️ Could not profile {getattr(fn, '__name__', fn)}: {e}")
+            return fn(*args)
+        try:
+            return fn(*args)
+        finally:
+            profiler.stop()
+            self._profiles.append(profiler)
+
+    def summary(self):
+        """Per-stage totals: `{stage: {"count", "wall_ms", "cpu_ms"}}`, slowest first."""
+        totals = {}
+        for entry in list(self.stages):
+            total = totals.setdefault(entry["stage"], {"count": 0, "wall_ms": 0.0, "cpu_ms": 0.0})
+            total["count"] += 1
+            total["wall_ms"] = round(total["wall_ms"] + entry["wall_ms"], 2)
+            total["cpu_ms"] = round(total["cpu_ms"] + entry["cpu_ms"], 2)
+        return dict(sorted(totals.items(), key=lambda item: -item[1]["wall_ms"]))
+
+    def save(self, directory=PROFILE_DIR):
+        """Write the merged profile and the timings to `directory`; return the timings record."""
+        os.makedirs(directory, exist_ok=True)
+        profile_file = None
+        results = [p.result for p in self._profiles if p.result is not None]
+        if results and self._profiles[0].kind == "pyinstrument":
+            from pyinstrument.renderers import HTMLRenderer
+            from pyinstrument.session import Session
+
+            merged = results[0]
+            for result in results[1:]:
+                merged = Session.combine(merged, result)
+            profile_file = f"{self.id}.html"
+            with open(os.path.join(directory, profile_file), "w") as f:
+                f.write(HTMLRenderer().render(merged))
+        elif results:
+            import pstats
+
+            stats = pstats.Stats(results[0])
+            for result in results[1:]:
+                stats.add(result)
+            profile_file = f"{self.id}.pstats"
+            stats.dump_stats(os.path.join(directory, profile_file))
+
+        record = {
+            "id": self.id,
+            "total_ms": round(self.duration * 1000, 2),
+            "profile_file": profile_file,
+            "stages": self.summary(),
+            "timeline": sorted(self.stages, key=lambda entry: entry["start_ms"]),
+        }
+        with open(os.path.join(directory, f"{self.id}.json"), "w") as f:
+            json.dump(record, f, indent=2)
+        prune(directory)
+        return record
+
+
+def prune(directory=PROFILE_DIR, keep=MAX_STORED_PROFILES):
+    """Delete all but the newest `keep` profiles."""
+    records = sorted((os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".json")),
+                     key=os.path.getmtime, reverse=True)
+    for path in records[keep:]:
+        profile_id = os.path.basename(path)[:-len(".json")]
+        for suffix in (".json", ".html", ".pstats"):
+            try:
+                os.remove(os.path.join(directory, profile_id + suffix))
+            except FileNotFoundError:
+                pass
+
+
+def load(profile_id, directory=PROFILE_DIR):
+    """Timings record of a stored profile, or None if there is no such profile."""
+    if not PROFILE_ID_PATTERN.match(profile_id):
+        return None
+    try:
+        with open(os.path.join(directory, f"{profile_id}.json"), "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+class ProfilingMiddleware:
+    """Profile requests to `paths` that ask for it (see `wanted`), from body parsing to the last byte sent."""
+
+    def __init__(self, app, paths):
+        self.app = app
+        self.paths = set(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths or not wanted(Headers(scope=scope)):
+            await self.app(scope, receive, send)
+            return
+
+        session = ProfileSession()
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", [])) + [(PROFILE_ID_HEADER.lower().encode(), session.id.encode())]
+                message = dict(message, headers=headers)
+            await send(message)
+
+        session_token = _session.set(session)
+        recorder_token = stage_recorder.set(session.record_stage)
+        session.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            session.stop()
+            stage_recorder.reset(recorder_token)
+            _session.reset(session_token)
+            # run_in_executor rather than asyncio.to_thread, which needs Python 3.9
+            record = await asyncio.get_running_loop().run_in_executor(None, session.save)
+            print(json.dumps({"event": "request_profile", "path": scope["path"], "id": record["id"],
+                              "total_ms": record["total_ms"], "profile_file": record["profile_file"],
+                              "stages": record["stages"]}))
@@ -0,0 +1,173 @@
+"""Local recipe corpus used to pre-select Home dishes before (or instead of) the LLM.
+
+Recipes are loaded from recipes.json into an inverted index from ingredient to
+recipe, and each recipe's allergens are packed into an integer bitset, so
+excluding allergens is a single AND per recipe. Candidates are ranked by how
+much of each recipe the fridge already covers.
+"""
+import json
+import os
+from collections import Counter
+
+RECIPES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "recipes.json")
+
+MEALS = ("breakfast", "lunch", "dinner")
+CANDIDATES_PER_MEAL = 3  # Shortlist size per meal sent to the LLM
+CONFIDENT_COVERAGE = 1.0  # Share of a recipe's ingredients the fridge must cover to skip the LLM
+
+ALLERGENS = ("dairy", "egg", "fish", "gluten", "nuts", "peanuts", "sesame", "shellfish", "soy")
+ALLERGEN_BITS = {name: 1 << i for i, name in enumerate(ALLERGENS)}
+ALLERGEN_ALIASES = {
+    "milk": "dairy", "lactose": "dairy", "cheese": "dairy",
+    "eggs": "egg",
+    "wheat": "gluten",
+    "nut": "nuts", "tree nut": "nuts", "tree nuts": "nuts", "almond": "nuts", "walnut": "nuts", "cashew": "nuts",
+    "peanut": "peanuts",
+    "shrimp": "shellfish", "prawn": "shellfish", "crab": "shellfish", "lobster": "shellfish",
+    "soya": "soy", "soybean": "soy",
+}
+
+# Fridge items that also satisfy a more generic recipe ingredient ("salmon" covers "fish")
+INGREDIENT_PARENTS = {"salmon": "fish", "tuna": "fish", "cod": "fish", "tilapia": "fish"}
+INGREDIENT_ALIASES = {
+    "chicken breast": "chicken", "greek yogurt": "yogurt", "prawn": "shrimp",
+    "spring onion": "scallion", "green onion": "scallion", "oatmeal": "oat",
+}
+# Dietary preferences a recipe must carry; any other preference only improves the ranking
+STRICT_PREFERENCES = {"vegetarian", "vegan"}
+
+GOAL_TIPS = {
+    "muscle gain": "Add a protein-rich side to each meal to support muscle repair.",
+    "weight loss": "Keep portions moderate and fill half of each plate with vegetables.",
+    "maintain health": "Rotate the vegetables through the week for a broad mix of vitamins.",
+}
+
+
+def normalize_ingredient(name):
+    """Lowercase, singular form of an ingredient name ("Tomatoes" -> "tomato")."""
+    name = " ".join(str(name).lower().split())
+    name = INGREDIENT_ALIASES.get(name, name)
+    if name.endswith("ies"):
+        name = name[:-3] + "y"
+    elif name.endswith("oes"):
+        name = name[:-2]
+    elif name.endswith("s") and not name.endswith(("ss", "us")):
+        name = name[:-1]
+    return INGREDIENT_ALIASES.get(name, name)
+
+
+def allergen_bits(allergy):
+    """Bitset of the known allergens named anywhere in one free-text allergy ("dairy products", "milk allergy")."""
+    words = str(allergy).lower().replace("-", " ").split()
+    phrases = {" ".join(words)} | set(words) | {" ".join(pair) for pair in zip(words, words[1:])}
+    phrases |= {normalize_ingredient(phrase) for phrase in phrases}
+    mask = 0
+    for phrase in phrases:
+        phrase = INGREDIENT_PARENTS.get(phrase, phrase)  # "salmon" is a fish allergy, as "salmon" covers "fish" in coverage
+        mask |= ALLERGEN_BITS.get(ALLERGEN_ALIASES.get(phrase, phrase), 0)
+    return mask
+
+
+def allergen_mask(allergies):
+    """Bitset of the known allergens in a free-text allergy list."""
+    mask = 0
+    for allergy in allergies:
+        mask |= allergen_bits(allergy)
+    return mask
+
+
+def normalize_tag(text):
+    return " ".join(str(text).lower().split())
+
+
+def plan_advice(goal):
+    """Two-sentence advice for a plan picked from the corpus without the LLM."""
+    tip = GOAL_TIPS.get(normalize_tag(goal), GOAL_TIPS["maintain health"])
+    return f"Advice: Every dish in this plan can be made with what is already in your fridge. {tip}"
+
+
+class RecipeIndex:
+    """Inverted ingredient index and allergen bitsets over a list of recipe dicts."""
+
+    def __init__(self, recipes):
+        self.recipes = []
+        self.tags = set()  # Every tag some recipe carries
+        self._by_ingredient = {}  # ingredient -> indexes of recipes using it
+        for recipe in recipes:
+            ingredients = {normalize_ingredient(i) for i in recipe["ingredients"]}
+            entry = dict(recipe, ingredients=sorted(ingredients),
+                         allergen_mask=allergen_mask(recipe.get("allergens", [])),
+                         tags={normalize_tag(t) for t in recipe.get("tags", [])})
+            self.tags |= entry["tags"]
+            for ingredient in ingredients:
+                self._by_ingredient.setdefault(ingredient, []).append(len(self.recipes))
+            self.recipes.append(entry)
+
+    @classmethod
+    def load(cls, path=RECIPES_PATH):
+        """Index the corpus at `path`; a missing file gives an empty index (everything goes to the LLM)."""
+        if not os.path.exists(path):
+            return cls([])
+        with open(path, "r") as f:
+            return cls(json.load(f))
+
+    def __len__(self):
+        return len(self.recipes)
+
+    def unmapped_allergies(self, allergies):
+        """Allergies the index cannot exclude reliably: neither a known allergen nor a corpus ingredient."""
+        return [a for a in allergies
+                if not allergen_bits(a) and normalize_ingredient(a) not in self._by_ingredient]
+
+    def unmapped_preferences(self, preferences):
+        """Preferences no recipe is tagged with, so the corpus cannot tell which recipes honour them."""
+        return [p for p in preferences if normalize_tag(p) and normalize_tag(p) not in self.tags]
+
+    def candidates(self, available_ingredients, allergies, preferences=(), goal=""):
+        """Recipes using at least one fridge ingredient, best coverage first.
+
+        Recipes containing a listed allergen are never returned, whether it is a
+        known allergen class ("gluten") or a plain ingredient ("avocado"). Each
+        result is the recipe plus `coverage` (0-1) and its `missing` ingredients.
+        """
+        fridge = {normalize_ingredient(i) for i in available_ingredients}
+        fridge |= {INGREDIENT_PARENTS[i] for i in fridge if i in INGREDIENT_PARENTS}
+        excluded_mask = allergen_mask(allergies)
+        excluded_ingredients = {normalize_ingredient(a) for a in allergies}
+        wanted_tags = {normalize_tag(p) for p in preferences} | {normalize_tag(goal)}
+        required_tags = wanted_tags & STRICT_PREFERENCES
+
+        hits = Counter(i for ingredient in fridge for i in self._by_ingredient.get(ingredient, ()))
+        ranked = []
+        for i, count in hits.items():
+            recipe = self.recipes[i]
+            if recipe["allergen_mask"] & excluded_mask or excluded_ingredients.intersection(recipe["ingredients"]):
+                continue
+            if not required_tags <= recipe["tags"]:
+                continue
+            coverage = count / len(recipe["ingredients"])
+            ranked.append((-coverage, -len(wanted_tags & recipe["tags"]), i, coverage))
+        ranked.sort()
+
+        return [
+            dict(self.recipes[i], coverage=coverage,
+                 missing=[x for x in self.recipes[i]["ingredients"] if x not in fridge])
+            for _, _, i, coverage in ranked
+        ]
+
+    @staticmethod
+    def shortlist(candidates, per_meal=CANDIDATES_PER_MEAL):
+        """The best few candidates for each meal, in breakfast/lunch/dinner order."""
+        return [c for meal in MEALS for c in [c for c in candidates if c["meal"] == meal][:per_meal]]
+
+    @staticmethod
+    def confident_plan(candidates, preferences=(), min_coverage=CONFIDENT_COVERAGE):
+        """Best breakfast, lunch and dinner tagged with every preference, if the fridge covers each of them, else None."""
+        required_tags = {normalize_tag(p) for p in preferences} - {""}
+        plan = []
+        for meal in MEALS:
+            best = next((c for c in candidates if c["meal"] == meal and required_tags <= c["tags"]), None)
+            if best is None or best["coverage"] < min_coverage:
+                return None
+            plan.append(best)
+        return plan
@@ -0,0 +1,199 @@
+"""Local index of every restaurant Google Places has returned, with its Yelp link.
+
+Restaurants are bucketed on a geohash grid so a radius query only looks at the
+cells around the user, then ranked with a vectorized haversine distance blended
+with the Google rating. Each (search cell, keyword) pair remembers when it was
+last refreshed from Places: while that is recent, or while the area already
+holds enough fresh matches, queries are answered locally without any API call.
+"""
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from cache import geohash, normalize_keyword
+
+RESTAURANT_INDEX_DB_PATH = os.environ.get("RESTAURANT_INDEX_DB", "restaurants.db")
+
+GRID_PRECISION = 5  # ~4.9km x 4.9km buckets for radius queries
+SEARCH_CELL_PRECISION = 6  # Same cells as the Places cache; a refresh covers one of these per keyword
+CELL_TTL = 24 * 60 * 60  # Seconds a refreshed (cell, keyword) is trusted before asking Places again
+MAX_PLACE_AGE = 7 * 24 * 60 * 60  # Restaurants not seen by Places for this long are ignored
+
+DISTANCE_WEIGHT = 0.6  # Share of the ranking score from closeness (the rest is rating)
+DEFAULT_RATING = 3.0  # Assumed for places Google has no rating for
+EARTH_RADIUS_M = 6371000.0
+
+
+def haversine_m(latitude, longitude, latitudes, longitudes):
+    """Great-circle distance in meters from one point to arrays of points."""
+    lat1, lng1 = np.radians(latitude), np.radians(longitude)
+    lat2, lng2 = np.radians(latitudes), np.radians(longitudes)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+
+
+def cell_size_degrees(precision):
+    """(latitude, longitude) extent of a geohash cell of `precision` characters."""
+    bits = 5 * precision
+    return 180.0 / 2 ** (bits // 2), 360.0 / 2 ** (bits - bits // 2)
+
+
+def cells_within(latitude, longitude, radius, precision=GRID_PRECISION):
+    """Geohash cells of `precision` that overlap the box around a circle of `radius` meters."""
+    lat_step, lng_step = cell_size_degrees(precision)
+    lat_delta = math.degrees(radius / EARTH_RADIUS_M)
+    lng_delta = lat_delta / max(math.cos(math.radians(latitude)), 1e-6)
+
+    lats = np.append(np.arange(latitude - lat_delta, latitude + lat_delta, lat_step), latitude + lat_delta)
+    lngs = np.append(np.arange(longitude - lng_delta, longitude + lng_delta, lng_step), longitude + lng_delta)
+    return {geohash(float(np.clip(lat, -90, 90)), float((lng + 180) % 360 - 180), precision)
+            for lat in lats for lng in lngs}
+
+
+def rank_scores(distances, ratings, radius):
+    """Higher is better: closeness within the radius blended with a 0-5 rating."""
+    closeness = 1 - np.clip(distances / radius, 0, 1)
+    return DISTANCE_WEIGHT * closeness + (1 - DISTANCE_WEIGHT) * ratings / 5
+
+
+def rank_restaurants(restaurants, latitude, longitude, radius, limit=None):
+    """Restaurants within `radius` meters of a point, best `rank_scores` first, each with its `distance_m`."""
+    if not restaurants:
+        return []
+
+    latitudes = np.array([r["latitude"] for r in restaurants])
+    longitudes = np.array([r["longitude"] for r in restaurants])
+    ratings = np.array([r["rating"] if isinstance(r["rating"], (int, float)) else DEFAULT_RATING
+                        for r in restaurants], dtype=float)
+    distances = haversine_m(latitude, longitude, latitudes, longitudes)
+
+    inside = np.flatnonzero(distances <= radius)
+    order = inside[np.argsort(-rank_scores(distances[inside], ratings[inside], radius), kind="stable")]
+    if limit is not None:
+        order = order[:limit]
+    return [dict(restaurants[i], distance_m=round(float(distances[i]))) for i in order]
+
+
+class RestaurantIndex:
+    """SQLite-backed restaurant table with an in-memory geohash grid and keyword index."""
+
+    def __init__(self, path=RESTAURANT_INDEX_DB_PATH):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS restaurants ("
+                " place_id TEXT PRIMARY KEY,"
+                " data TEXT NOT NULL,"
+                " keywords TEXT NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS refreshed_cells ("
+                " cell TEXT NOT NULL,"
+                " keyword TEXT NOT NULL,"
+                " refreshed_at REAL NOT NULL,"
+                " PRIMARY KEY (cell, keyword))"
+            )
+            rows = self._conn.execute("SELECT place_id, data, keywords, updated_at FROM restaurants").fetchall()
+            cells = self._conn.execute("SELECT cell, keyword, refreshed_at FROM refreshed_cells").fetchall()
+
+        self._places = {}  # place_id -> restaurant dict
+        self._updated = {}  # place_id -> last time Places returned it
+        self._keywords = {}  # keyword -> set of place_ids Places returned for it
+        self._place_keywords = {}  # place_id -> set of keywords it was returned for
+        self._grid = {}  # geohash cell -> set of place_ids
+        self._refreshed = {(cell, keyword): refreshed_at for cell, keyword, refreshed_at in cells}
+        self.local_hits = 0
+        self.refreshes = 0
+        for place_id, data, keywords, updated_at in rows:
+            self._remember(json.loads(data), json.loads(keywords), updated_at)
+
+    def __len__(self):
+        return len(self._places)
+
+    def _remember(self, restaurant, keywords, updated_at):
+        place_id = restaurant["place_id"]
+        self._places[place_id] = restaurant
+        self._updated[place_id] = updated_at
+        for keyword in keywords:
+            self._keywords.setdefault(keyword, set()).add(place_id)
+            self._place_keywords.setdefault(place_id, set()).add(keyword)
+        cell = geohash(restaurant["latitude"], restaurant["longitude"], GRID_PRECISION)
+        self._grid.setdefault(cell, set()).add(place_id)
+
+    def is_fresh(self, keyword, latitude, longitude, now=None):
+        """True if this keyword was refreshed from Places around this point within CELL_TTL."""
+        now = time.time() if now is None else now
+        cell = geohash(latitude, longitude, SEARCH_CELL_PRECISION)
+        with self._lock:
+            refreshed_at = self._refreshed.get((cell, normalize_keyword(keyword)))
+        return refreshed_at is not None and now - refreshed_at < CELL_TTL
+
+    def query(self, keyword, latitude, longitude, radius, limit=None):
+        """Restaurants known for `keyword` within `radius` meters, best first.
+
+        Each result is a copy with its `distance_m` from the query point.
+        """
+        keyword = normalize_keyword(keyword)
+        cutoff = time.time() - MAX_PLACE_AGE
+        cells = cells_within(latitude, longitude, radius)
+        with self._lock:
+            nearby = set().union(*(self._grid.get(cell, ()) for cell in cells))
+            candidates = [self._places[p] for p in self._keywords.get(keyword, set()) & nearby
+                          if self._updated[p] >= cutoff]
+        return rank_restaurants(candidates, latitude, longitude, radius, limit)
+
+    def lookup(self, keyword, latitude, longitude, radius, limit):
+        """Answer locally if this area is known well enough, else return None (a Places refresh is due).
+
+        Known well enough means the (cell, keyword) was refreshed within CELL_TTL, or
+        the index already holds at least `limit` fresh matches within the radius.
+        """
+        results = self.query(keyword, latitude, longitude, radius, limit)
+        if len(results) >= limit or self.is_fresh(keyword, latitude, longitude):
+            with self._lock:
+                self.local_hits += 1
+            return results
+        return None
+
+    def add(self, keyword, latitude, longitude, restaurants):
+        """Record what a Places search for `keyword` around a point returned, and mark the cell fresh."""
+        keyword = normalize_keyword(keyword)
+        cell = geohash(latitude, longitude, SEARCH_CELL_PRECISION)
+        now = time.time()
+        with self._lock, self._conn:
+            rows = []
+            for restaurant in restaurants:
+                restaurant = {k: v for k, v in restaurant.items() if k != "distance_m"}
+                self._remember(restaurant, [keyword], now)
+                rows.append((restaurant["place_id"], json.dumps(restaurant),
+                             json.dumps(sorted(self._place_keywords[restaurant["place_id"]])), now))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO restaurants (place_id, data, keywords, updated_at) VALUES (?, ?, ?, ?)", rows
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO refreshed_cells (cell, keyword, refreshed_at) VALUES (?, ?, ?)",
+                (cell, keyword, now)
+            )
+            self._refreshed[(cell, keyword)] = now
+            self.refreshes += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "restaurants": len(self._places),
+                "keywords": len(self._keywords),
+                "grid_cells": len(self._grid),
+                "local_hits": self.local_hits,
+                "refreshes": self.refreshes,
+            }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
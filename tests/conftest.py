@@ -0,0 +1,9 @@
+import os
+import sys
+
+# The backend modules live flat at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep the stores that demo.py opens at import time out of the working tree
+for name in ("FRIDGE_DB", "NUTRITION_DB", "RESTAURANT_INDEX_DB"):
+    os.environ.setdefault(name, ":memory:")
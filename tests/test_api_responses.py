@@ -0,0 +1,36 @@
+from starlette.requests import Request
+
+from api_responses import conditional_response, etag, etag_matches
+
+
+def request_with(headers):
+    raw = [(name.lower().encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "POST", "path": "/recommend", "headers": raw})
+
+
+def test_fresh_request_gets_body_and_etag():
+    response = conditional_response(request_with({}), "key", {"a": 1})
+    assert response.status_code == 200
+    assert response.body == b'{"a":1}'
+    assert response.headers["etag"].startswith('W/"')
+    assert response.headers["cache-control"] == "no-cache"
+
+
+def test_matching_if_none_match_gets_304():
+    tag = conditional_response(request_with({}), "key", {"a": 1}).headers["etag"]
+    response = conditional_response(request_with({"If-None-Match": tag}), "key", {"a": 1})
+    assert response.status_code == 304
+    assert response.body == b""
+    assert response.headers["etag"] == tag
+
+
+def test_changed_result_is_sent_again():
+    tag = conditional_response(request_with({}), "key", {"a": 1}).headers["etag"]
+    assert conditional_response(request_with({"If-None-Match": tag}), "key", {"a": 2}).status_code == 200
+
+
+def test_etag_matches_weak_and_lists():
+    tag = etag("x")
+    assert etag_matches(f'"other", {tag[2:]}', tag)
+    assert etag_matches("*", tag)
+    assert not etag_matches(None, tag)
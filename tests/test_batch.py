@@ -0,0 +1,39 @@
+import asyncio
+import json
+
+import batch
+import demo
+
+COMPLETE = {"recommendations": {meal: {"dish": "Soup", "nutrients": {"calories": 100}}
+                                for meal in ("breakfast", "lunch", "dinner")}}
+
+
+async def collect(records, process, is_complete=None):
+    return [result async for result in batch.run_batch(records, process, 2, is_complete)]
+
+
+def test_run_batch_reports_incomplete_responses_as_errors():
+    async def process(record):
+        return COMPLETE if record["ok"] else {"recommendations": {}}
+
+    results = asyncio.run(collect([("1", {"ok": True}), ("2", {"ok": False})], process, demo.is_complete_response))
+    by_id = {r["id"]: r for r in results}
+    assert "error" not in by_id["1"]
+    assert "error" in by_id["2"] and by_id["2"]["response"] == {"recommendations": {}}
+
+
+def test_run_file_checkpoints_only_complete_records(tmp_path, monkeypatch):
+    async def recommend(request):
+        return COMPLETE if request.goal == "ok" else {"restaurants": [], "error": "Yelp is down"}
+
+    monkeypatch.setattr(demo, "recommend", recommend)
+    source = tmp_path / "requests.jsonl"
+    source.write_text("\n".join(json.dumps({"id": record_id, "goal": goal, "preferences": [], "eat_location": "Home"})
+                                for record_id, goal in (("a", "ok"), ("b", "down"))))
+    output, checkpoint = tmp_path / "out.jsonl", tmp_path / "out.checkpoint"
+
+    asyncio.run(batch.run_file(str(source), str(output), str(checkpoint)))
+
+    assert checkpoint.read_text().split() == ["a"]
+    errors = {r["id"]: r.get("error") for r in map(json.loads, output.read_text().splitlines())}
+    assert errors == {"a": None, "b": "Yelp is down"}
@@ -0,0 +1,29 @@
+import time
+
+from cache import ProviderCache, SQLiteBackend
+
+
+def test_values_from_sqlite_keep_their_stored_expiry():
+    backend = SQLiteBackend(":memory:")
+    backend.set("places", "k", '"v"', time.time() + 0.2)
+    cache = ProviderCache("places", ttl=3600, backend=backend)
+    assert cache.get("k") == "v"
+    time.sleep(0.25)
+    assert cache.get("k", "miss") == "miss"  # Not kept in memory for a fresh hour
+
+
+def test_set_writes_through_to_sqlite():
+    backend = SQLiteBackend(":memory:")
+    ProviderCache("yelp", ttl=60, backend=backend).set("k", [1, 2])
+    assert ProviderCache("yelp", ttl=60, backend=backend).get("k") == [1, 2]
+
+
+def test_expired_rows_are_purged_on_open(tmp_path):
+    path = str(tmp_path / "cache.db")
+    backend = SQLiteBackend(path)
+    backend.set("places", "old", '"v"', time.time() - 1)
+    backend.set("places", "live", '"v"', time.time() + 60)
+    backend.close()
+
+    backend = SQLiteBackend(path)
+    assert backend._conn.execute("SELECT key FROM cache").fetchall() == [("live",)]
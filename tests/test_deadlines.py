@@ -0,0 +1,55 @@
+import asyncio
+
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+import deadlines
+from deadlines import AdmissionMiddleware, AdmissionQueue, parse_budget, request_budget
+
+
+def test_parse_budget_clamps_and_defaults():
+    assert parse_budget("250") == 0.25
+    assert parse_budget("1") == deadlines.MIN_BUDGET
+    assert parse_budget("9999999") == deadlines.MAX_BUDGET
+    assert parse_budget("soon", default=7) == 7
+
+
+def test_queue_sheds_beyond_active_and_queued_limits():
+    async def scenario():
+        queue = AdmissionQueue(max_active=1, max_queued=1)
+        assert await queue.acquire()
+        waiting = asyncio.ensure_future(queue.acquire())
+        await asyncio.sleep(0)
+        assert queue.stats() == {"active": 1, "queued": 1, "rejected": 0}
+        assert not await queue.acquire()  # Slot and queue both full
+        queue.release(0.5)
+        assert await waiting
+        assert queue.stats() == {"active": 1, "queued": 0, "rejected": 1}
+        assert queue.retry_after() >= 1
+
+    asyncio.run(scenario())
+
+
+def test_queued_request_gives_up_at_its_deadline():
+    async def scenario():
+        queue = AdmissionQueue(max_active=1, max_queued=5)
+        assert await queue.acquire()
+        with request_budget(0.05):
+            assert not await queue.acquire()
+        assert queue.stats()["rejected"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_middleware_answers_429_with_retry_after():
+    queue = AdmissionQueue(max_active=1, max_queued=0)
+    app = Starlette(routes=[Route("/recommend", lambda request: PlainTextResponse("ok"), methods=["POST"])])
+    app.add_middleware(AdmissionMiddleware, queue=queue, paths=("/recommend",))
+    with TestClient(app) as client:
+        assert client.post("/recommend").status_code == 200
+        client.portal.call(queue.acquire)  # Occupy the only slot
+        response = client.post("/recommend")
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) >= 1
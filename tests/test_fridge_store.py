@@ -0,0 +1,67 @@
+import pytest
+
+from fridge_store import FridgeStore
+
+
+@pytest.fixture
+def store():
+    store = FridgeStore(":memory:")
+    yield store
+    store.close()
+
+
+def test_add_counts_repeats_and_normalizes(store):
+    assert store.add("u", ["Egg", " egg ", "Milk", ""]) == {"egg": 2, "milk": 1}
+
+
+def test_remove_decrements_then_deletes(store):
+    store.add("u", ["egg", "egg"])
+    assert store.remove("u", "egg")
+    assert store.items("u") == {"egg": 1}
+    assert store.remove("u", "EGG")
+    assert store.items("u") == {}
+    assert not store.remove("u", "egg")
+
+
+def test_remove_more_than_stored_deletes_the_row(store):
+    store.add("u", ["egg"])
+    assert store.remove("u", "egg", quantity=5)
+    assert store.items("u") == {}
+
+
+def test_remove_all(store):
+    store.add("u", ["egg", "egg", "egg"])
+    assert store.remove("u", "egg", quantity=None)
+    assert store.items("u") == {}
+
+
+@pytest.mark.parametrize("quantity", [0, -2])
+def test_remove_rejects_quantity_below_one(store, quantity):
+    store.add("u", ["egg"])
+    with pytest.raises(ValueError):
+        store.remove("u", "egg", quantity=quantity)
+    assert store.items("u") == {"egg": 1}
+
+
+def test_users_have_separate_fridges(store):
+    store.add("a", ["egg"])
+    store.add("b", ["milk"])
+    assert store.items("a") == {"egg": 1}
+    assert not store.remove("b", "egg")
+
+
+def test_legacy_file_is_imported_once(store, tmp_path):
+    path = tmp_path / "fridge.json"
+    path.write_text('["egg", "Egg", "milk"]')
+    assert store.import_legacy_file(str(path))
+    assert not store.import_legacy_file(str(path))
+    assert store.items("default") == {"egg": 2, "milk": 1}
+
+
+def test_malformed_legacy_file_is_retried_later(store, tmp_path):
+    path = tmp_path / "fridge.json"
+    path.write_text('["egg", ')
+    assert not store.import_legacy_file(str(path))
+    path.write_text('["egg"]')
+    assert store.import_legacy_file(str(path))
+    assert store.items("default") == {"egg": 1}
@@ -0,0 +1,49 @@
+import socket
+
+import httpcore
+import httpx
+import pytest
+
+import http_pool
+from http_pool import CachingNetworkBackend, PoolTransport
+
+
+class FailingResolver:
+    def resolve(self, host, port):
+        raise socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+
+
+def test_failed_lookup_is_a_connect_error():
+    with pytest.raises(httpcore.ConnectError):
+        CachingNetworkBackend(FailingResolver()).connect_tcp("api.example.invalid", 443)
+
+
+@pytest.fixture
+def proxy_env(monkeypatch):
+    for name in ("HTTP_PROXY", "HTTPS_PROXY", "ALL_PROXY", "NO_PROXY", "http_proxy", "https_proxy", "all_proxy",
+                 "no_proxy"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("HTTPS_PROXY", "proxy.internal:3128")
+    monkeypatch.setenv("NO_PROXY", "localhost,127.0.0.1")
+    saved = dict(http_pool._host_limits), dict(http_pool._host_urls)
+    yield
+    http_pool._host_limits.clear()
+    http_pool._host_limits.update(saved[0])
+    http_pool._host_urls.clear()
+    http_pool._host_urls.update(saved[1])
+
+
+def test_proxy_for_honours_no_proxy(proxy_env):
+    assert http_pool.proxy_for("https://api.yelp.com") == "http://proxy.internal:3128"
+    assert http_pool.proxy_for("http://127.0.0.1:8001") is None
+    assert http_pool.proxy_for("http://api.yelp.com") is None  # Only HTTPS_PROXY is set
+
+
+def test_provider_hosts_go_through_the_proxy(proxy_env):
+    http_pool.configure({"https://api.yelp.com": 4, "http://127.0.0.1:8001": 4})
+    client = http_pool.build_client()
+    try:
+        assert isinstance(client._transport_for_url(httpx.URL("https://api.yelp.com/v3")), httpx.HTTPTransport)
+        assert isinstance(client._transport_for_url(httpx.URL("http://127.0.0.1:8001/")), PoolTransport)
+    finally:
+        client.close()
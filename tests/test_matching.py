@@ -0,0 +1,34 @@
+import numpy as np
+
+from matching import assign, blocking_mask, match_yelp
+
+
+def test_assign_keeps_valid_match_over_two_sub_threshold_pairs():
+    scores = np.array([[80, 74], [74, 0]], dtype=np.float32)
+    assert assign(scores, threshold=75) == [0, None]
+
+
+def test_assign_is_one_to_one():
+    scores = np.array([[90, 10], [95, 10]], dtype=np.float32)
+    assert assign(scores, threshold=75) == [None, 0]
+
+
+def test_match_yelp_matches_same_business():
+    places = [
+        {"name": "Joe's Pizza", "vicinity": "7 Carmine St, New York"},
+        {"name": "Golden Lotus", "vicinity": "12 Main St, New York"},
+    ]
+    yelp_data = {
+        "joe's pizza": {"url": "https://www.yelp.com/biz/joes-pizza", "address": "7 Carmine St New York, NY"},
+        "maple house": {"url": "https://www.yelp.com/biz/maple-house", "address": "99 Elm St New York, NY"},
+    }
+    assert match_yelp(places, yelp_data) == ["joe's pizza", None]
+
+
+def test_match_yelp_without_yelp_data():
+    assert match_yelp([{"name": "A", "vicinity": ""}], {}) == [None]
+
+
+def test_blocking_pairs_only_names_sharing_a_token():
+    mask = blocking_mask(["Joe's Pizza", "Golden Lotus"], ["Joes Pizza Carmine", "Maple House"])
+    assert mask.tolist() == [[True, False], [False, False]]
@@ -0,0 +1,25 @@
+import json
+
+from demo import parse_nutrition_batch
+
+NUTRIENTS = {"calories": 350, "protein": 12, "carbohydrates": 30, "fat": 18}
+
+
+def answer(*dishes):
+    return json.dumps([dict(NUTRIENTS, dish=dish) for dish in dishes])
+
+
+def test_matches_by_dish_not_position():
+    result = parse_nutrition_batch(answer("Lentil Soup", "Avocado Toast"), ["Avocado Toast", "Lentil Soup", "Tofu"])
+    assert result[0]["calories"] == 350 and result[1]["calories"] == 350
+    assert result[2] is None
+
+
+def test_numbered_dish_names_match():
+    assert parse_nutrition_batch(answer("Avocado Toast"), ["1. Avocado Toast"])[0] is not None
+    assert parse_nutrition_batch(answer("2) avocado toast!"), ["Avocado Toast"])[0] is not None
+
+
+def test_unusable_answers_give_none():
+    assert parse_nutrition_batch("no json here", ["A", "B"]) == [None, None]
+    assert parse_nutrition_batch(json.dumps([{"dish": "A", "calories": "lots"}]), ["A"]) == [None]
@@ -0,0 +1,127 @@
+import threading
+import time
+
+import pytest
+
+import deadlines
+from deadlines import DeadlineExceeded, request_budget
+from outbound import CircuitBreaker, SingleFlight, TokenBucket
+
+
+def open_breaker(reset_timeout=0.05):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=reset_timeout)
+    breaker.record_failure()
+    breaker.record_failure()
+    return breaker
+
+
+def test_breaker_opens_after_threshold():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+
+def test_half_open_breaker_lets_one_probe_through():
+    breaker = open_breaker()
+    time.sleep(0.06)
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()  # Probe still in flight
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow() and breaker.allow()
+
+
+def test_failed_probe_reopens_breaker():
+    breaker = open_breaker()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+
+def test_released_probe_lets_next_caller_probe():
+    breaker = open_breaker()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.release_probe()
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+
+
+def run_in_thread(results, name, fn, budget, delay=0.0):
+    def target():
+        time.sleep(delay)
+        with request_budget(budget):
+            try:
+                results[name] = fn()
+            except Exception as e:
+                results[name] = e
+
+    thread = threading.Thread(target=target)
+    thread.start()
+    return thread
+
+
+def test_single_flight_shares_result():
+    flights = SingleFlight()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.1)
+        return "ok"
+
+    results = {}
+    threads = [run_in_thread(results, name, lambda: flights.do("k", fetch), budget=5, delay=delay)
+               for name, delay in (("leader", 0), ("follower", 0.02))]
+    for thread in threads:
+        thread.join()
+    assert results == {"leader": "ok", "follower": "ok"}
+    assert len(calls) == 1
+
+
+def test_single_flight_follower_retries_after_leader_deadline():
+    flights = SingleFlight()
+
+    def fetch():
+        deadline = time.monotonic() + 0.2
+        while time.monotonic() < deadline:
+            if deadlines.expired():
+                raise DeadlineExceeded("leader out of budget")
+            time.sleep(0.005)
+        return "ok"
+
+    results = {}
+    threads = [run_in_thread(results, "leader", lambda: flights.do("k", fetch), budget=0.05),
+               run_in_thread(results, "follower", lambda: flights.do("k", fetch), budget=5, delay=0.01)]
+    for thread in threads:
+        thread.join()
+    assert isinstance(results["leader"], DeadlineExceeded)
+    assert results["follower"] == "ok"
+
+
+def test_single_flight_follower_gives_up_at_its_own_deadline():
+    flights = SingleFlight()
+    results = {}
+    threads = [run_in_thread(results, "leader", lambda: flights.do("k", lambda: time.sleep(0.3) or "ok"), budget=5),
+               run_in_thread(results, "follower", lambda: flights.do("k", lambda: "unused"), budget=0.05, delay=0.02)]
+    for thread in threads:
+        thread.join()
+    assert results["leader"] == "ok"
+    assert isinstance(results["follower"], DeadlineExceeded)
+
+
+def test_token_bucket_gives_up_within_timeout():
+    bucket = TokenBucket(rate=1, burst=1)
+    assert bucket.acquire()
+    start = time.monotonic()
+    assert not bucket.acquire(timeout=0.05)
+    assert time.monotonic() - start < 0.05
+
+
+def test_deadline_check_raises_once_spent():
+    with request_budget(0):
+        with pytest.raises(DeadlineExceeded):
+            deadlines.check("test")
@@ -0,0 +1,66 @@
+from recipe_index import RecipeIndex, allergen_mask
+
+RECIPES = [
+    {"name": "Omelette", "meal": "breakfast", "ingredients": ["egg", "spinach"], "allergens": ["egg"], "tags": []},
+    {"name": "Yogurt Bowl", "meal": "breakfast", "ingredients": ["yogurt", "oats"], "allergens": ["dairy", "gluten"],
+     "tags": ["vegetarian"]},
+    {"name": "Spinach Salad", "meal": "lunch", "ingredients": ["spinach", "avocado"], "allergens": [],
+     "tags": ["vegetarian"]},
+    {"name": "Fish Tacos", "meal": "dinner", "ingredients": ["fish", "tortilla"], "allergens": ["fish", "gluten"],
+     "tags": []},
+    {"name": "Shrimp Rice", "meal": "dinner", "ingredients": ["shrimp", "rice"], "allergens": ["shellfish"], "tags": []},
+]
+FRIDGE = ["egg", "spinach", "yogurt", "oats", "avocado", "shrimp", "rice", "salmon", "tortilla"]
+
+
+def names(candidates):
+    return {c["name"] for c in candidates}
+
+
+def test_no_allergies_returns_every_matching_recipe():
+    assert names(RecipeIndex(RECIPES).candidates(FRIDGE, [])) == {r["name"] for r in RECIPES}
+
+
+def test_allergen_class_and_aliases_are_excluded():
+    index = RecipeIndex(RECIPES)
+    assert names(index.candidates(FRIDGE, ["Milk allergy", "prawns", "wheat"])) == {"Omelette", "Spinach Salad"}
+    assert names(index.candidates(FRIDGE, ["eggs"])) == {"Yogurt Bowl", "Spinach Salad", "Fish Tacos", "Shrimp Rice"}
+
+
+def test_specific_fish_allergy_excludes_generic_fish():
+    index = RecipeIndex(RECIPES)
+    assert "Fish Tacos" in names(index.candidates(FRIDGE, []))  # Salmon in the fridge covers "fish"
+    assert "Fish Tacos" not in names(index.candidates(FRIDGE, ["salmon"]))
+    assert index.unmapped_allergies(["tuna"]) == []
+
+
+def test_plain_ingredient_allergy_is_excluded():
+    assert "Spinach Salad" not in names(RecipeIndex(RECIPES).candidates(FRIDGE, ["Avocados"]))
+
+
+def test_allergen_mask_reads_free_text():
+    assert allergen_mask(["dairy products", "tree nuts"]) == allergen_mask(["dairy", "nuts"])
+
+
+def test_unmapped_allergies():
+    index = RecipeIndex(RECIPES)
+    assert index.unmapped_allergies(["gluten", "avocado", "kiwi"]) == ["kiwi"]
+
+
+def test_unmapped_preferences():
+    index = RecipeIndex(RECIPES)
+    assert index.unmapped_preferences(["Vegetarian", "keto", " "]) == ["keto"]
+
+
+def test_confident_plan_requires_every_preference_tag():
+    recipes = [
+        {"name": "Oats", "meal": "breakfast", "ingredients": ["oats"], "tags": ["vegan", "high fiber"]},
+        {"name": "Eggs", "meal": "breakfast", "ingredients": ["egg"], "tags": ["high protein"]},
+        {"name": "Salad", "meal": "lunch", "ingredients": ["lettuce"], "tags": ["vegan", "high fiber"]},
+        {"name": "Beans", "meal": "dinner", "ingredients": ["beans"], "tags": ["vegan", "high fiber"]},
+    ]
+    index = RecipeIndex(recipes)
+    fridge = ["oats", "egg", "lettuce", "beans"]
+    plan = index.confident_plan(index.candidates(fridge, [], ["high fiber"]), ["High Fiber"])
+    assert [r["name"] for r in plan] == ["Oats", "Salad", "Beans"]
+    assert index.confident_plan(index.candidates(fridge, [], ["high protein"]), ["high protein"]) is None
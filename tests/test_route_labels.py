@@ -0,0 +1,24 @@
+from fastapi.testclient import TestClient
+
+import demo
+
+
+def scope(method, path):
+    return {"type": "http", "method": method, "path": path, "root_path": "", "headers": [], "query_string": b""}
+
+
+def test_route_label_is_the_path_template():
+    assert demo.route_label(scope("GET", "/fridge/bob")) == "/fridge/{user_id}"
+    assert demo.route_label(scope("DELETE", "/fridge/bob/items/egg")) == "/fridge/{user_id}/items/{item}"
+    assert demo.route_label(scope("PUT", "/fridge/bob")) == "/fridge/{user_id}"  # 405, still the route
+    assert demo.route_label(scope("GET", "/no/such/page")) == "unmatched"
+
+
+def test_latency_and_in_flight_share_the_label():
+    with TestClient(demo.app) as client:
+        client.get("/fridge/bob")
+        metrics = client.get("/metrics").text
+    assert 'route="/fridge/{user_id}"' in metrics
+    assert 'route="/fridge/bob"' not in metrics
+    in_flight = [line for line in metrics.splitlines() if line.startswith("recommender_http_requests_in_flight{")]
+    assert any('route="/metrics"' in line for line in in_flight)